@@ -1,140 +1,139 @@
 """
 주식 스크리닝 웹 대시보드 - Flask 서버
-실행: python3 app.py
-접속: http://localhost:5000
+실행: python3 app.py (개발용) / gunicorn app:app (운영, gunicorn.conf.py)
+접속: http://localhost:8080
 """
 
-from flask import Flask, render_template, jsonify, request
-from fetcher import get_signals, get_investor_data
-import threading
-import subprocess
-import re
+from flask import Flask, Response, render_template, jsonify, request, send_from_directory
+from flask.json.provider import JSONProvider
+from fetcher import (get_signals, get_investor_data, get_last_bday,
+                     INVESTOR_SNAPSHOT_DIR, investor_snapshot_name)
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
 import os
+import threading
+import time
+import strategy_golden_pullback as strategy
+
+try:
+    import orjson
+except ImportError:  # 없으면 Flask 기본 json 사용
+    orjson = None
+
+
+class ORJSONProvider(JSONProvider):
+    """orjson 기반 JSON 직렬화 (numpy 스칼라/배열도 그대로 처리)"""
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 
 app = Flask(__name__)
+if orjson is not None:
+    app.json = ORJSONProvider(app)
+
+@dataclass
+class ScanState:
+    is_running: bool = False
+    progress: float = 0.0
+    message: str = '대기 중'
+    signals_found: int = 0
+    stopped: bool = False
+    found_items: list = field(default_factory=list)
+    version: int = 0  # 상태가 바뀔 때마다 증가 (SSE 스트림 변경 감지용)
+
+    def to_dict(self) -> dict:
+        return {
+            'is_running': self.is_running,
+            'progress': self.progress,
+            'message': self.message,
+            'signals_found': self.signals_found,
+            'found_items': self.found_items
+        }
+
 
 # 스캐너 상태 전역 변수 (타겟별로 관리)
-scan_state = {
-    'price_gc': {'is_running': False, 'progress': 0.0, 'message': '대기 중', 'signals_found': 0, 'process': None, 'stopped': False, 'found_items': []},
-    'vol_gc':   {'is_running': False, 'progress': 0.0, 'message': '대기 중', 'signals_found': 0, 'process': None, 'stopped': False, 'found_items': []},
-    'pullback': {'is_running': False, 'progress': 0.0, 'message': '대기 중', 'signals_found': 0, 'process': None, 'stopped': False, 'found_items': []},
-}
+scan_state = {target: ScanState() for target in strategy.TARGET_OUTPUTS}
+
+# 상태 변경 알림 (run_scanner_bg → /api/scan/stream)
+_scan_cond = threading.Condition()
+SSE_MIN_INTERVAL = 0.5   # 스트림 이벤트 최소 간격 (초) - 종목별 변경을 묶어서 전송
+SSE_KEEPALIVE = 15       # 변경이 없을 때 연결 유지용 주석 전송 간격 (초)
+
+
+def _notify(state):
+    with _scan_cond:
+        state.version += 1
+        _scan_cond.notify_all()
+
+
+def is_valid_date(date: str) -> bool:
+    """YYYYMMDD 형식의 실제 날짜인지"""
+    try:
+        return len(date) == 8 and datetime.strptime(date, '%Y%m%d') is not None
+    except ValueError:
+        return False
 
 def run_scanner_bg(target_type, target_date=None, top_n=500):
+    """전략 모듈을 같은 프로세스에서 직접 실행하고 콜백으로 scan_state 갱신"""
     global scan_state
     state = scan_state[target_type]
-    state['is_running'] = True
-    state['progress'] = 0.0
-    state['message'] = '1. 분석 엔진 가동 중 (라이브러리 로딩...)'
-    state['signals_found'] = 0
-    state['stopped'] = False
-    state['process'] = None
-    state['found_items'] = []
-    
-    import sys
-    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'strategy_golden_pullback.py')
-    
+    state.is_running = True
+    state.progress = 0.0
+    state.message = '1. 분석 엔진 가동 중...'
+    state.signals_found = 0
+    state.stopped = False
+    state.found_items = []
+    _notify(state)
+
+    n_markets = len(strategy.MARKETS)
+
+    def on_progress(market, current_cnt, total_cnt, sigs):
+        m_idx = strategy.MARKETS.index(market)
+        if current_cnt == 0:
+            state.message = f'{market} 스캔 시작'
+            _notify(state)
+            return
+
+        # 몇 개 중 몇 개 째인지에 따라 프로그레스 (0~100) 계산, 시장별 균등 분배
+        raw_pct = (current_cnt / total_cnt) * 100.0 if total_cnt > 0 else 0
+        state.progress = (m_idx * 100.0 + raw_pct) / n_markets
+        if not state.stopped:  # 중지 요청 안내 메시지를 덮어쓰지 않음
+            state.message = f'[{m_idx + 1}/{n_markets}] {market} 탐색 중... ({current_cnt}/{total_cnt})'
+        state.signals_found = sigs
+        _notify(state)
+
+    def on_found(market, item):
+        state.found_items.append({'market': market, 'item': item})
+        _notify(state)
+
     try:
-        cmd = [sys.executable, '-u', script_path, '--target', target_type]
-        if target_date:
-            cmd.extend(['--target_date', target_date])
-        if top_n is not None:
-            cmd.extend(['--top_n', str(top_n)])
-            
-        env = os.environ.copy()
-        
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.STDOUT,
-            text=True,
-            bufsize=1,
-            encoding='utf-8',
-            errors='replace',
-            env=env
+        base_date_dt = datetime.strptime(target_date, "%Y-%m-%d") if target_date else datetime.now()
+        base_date = base_date_dt.strftime("%Y%m%d")
+        start_date = (base_date_dt - timedelta(days=400)).strftime("%Y%m%d")
+
+        result = strategy.run_scan(
+            target_type, base_date, start_date, top_n if top_n is not None else 500,
+            on_progress=on_progress,
+            on_found=on_found,
+            should_stop=lambda: state.stopped,
         )
-        state['process'] = process
-        
-        # 정규식 패턴: [25/500] 신호 4개 (퍼센트 삭제)
-        pattern = re.compile(r'\[\s*(\d+)/(\d+)\]\s*.*신호\s*(\d+)개')
-        current_market = ""
 
-        for line in iter(process.stdout.readline, ''):
-            if state['stopped']:
-                break
-            if not line:
-                break
-            line = line.strip()
-            if not line:
-                continue
-                
-            if line.startswith("!!!FOUND_JSON!!!"):
-                try:
-                    import json
-                    json_str = line.replace("!!!FOUND_JSON!!!", "", 1).strip()
-                    data = json.loads(json_str)
-                    state['found_items'].append(data)
-                except Exception as e:
-                    pass
-                continue
-            
-            if "[KOSPI]" in line and "시가총액 상위" in line:
-                current_market = "KOSPI"
-                state['message'] = 'KOSPI 주목 종목 추출 중...'
-            elif "[KOSPI]" in line and "전략 스캔 시작" in line:
-                current_market = "KOSPI"
-                state['message'] = 'KOSPI 스캔 시작'
-            elif "[KOSDAQ]" in line and "시가총액 상위" in line:
-                current_market = "KOSDAQ"
-                state['message'] = 'KOSDAQ 종목 추출 중...'
-            elif "[KOSDAQ]" in line and "전략 스캔 시작" in line:
-                current_market = "KOSDAQ"
-                state['message'] = 'KOSDAQ 스캔 시작'
-            
-            # 진행 표시 줄에서 시장명 강제 추출 (예: [KOSDAQ][ 1/10])
-            if "[KOSPI][" in line:
-                current_market = "KOSPI"
-            elif "[KOSDAQ][" in line:
-                current_market = "KOSDAQ"
-                
-            match = pattern.search(line)
-            if match:
-                current_cnt = int(match.group(1))
-                total_cnt = int(match.group(2))
-                sigs = int(match.group(3))
-                
-                # 단순히 몇 개 중 몇 개 째인지에 따라 가상 프로그레스 (0~100) 계산
-                # KOSPI 50%, KOSDAQ 50% 분배
-                raw_pct = (current_cnt / total_cnt) * 100.0 if total_cnt > 0 else 0
-                
-                if current_market == "KOSPI":
-                    state['progress'] = raw_pct / 2
-                    state['message'] = f'[1/2] KOSPI 탐색 중... ({current_cnt}/{total_cnt})'
-                elif current_market == "KOSDAQ":
-                    state['progress'] = 50.0 + (raw_pct / 2)
-                    state['message'] = f'[2/2] KOSDAQ 탐색 중... ({current_cnt}/{total_cnt})'
-                else:
-                    # 시장이 감지되지 않은 경우에도 진행도는 올림
-                    state['progress'] = raw_pct
-                    state['message'] = f'스캔 진행 중... ({current_cnt}/{total_cnt})'
-                    
-                state['signals_found'] = sigs
-                
-        process.wait()
-        
-        if state['stopped']:
-            state['message'] = '🛑 사용자에 의해 스캔이 중지되었습니다.'
-        elif process.returncode == 0:
-            state['progress'] = 100.0
-            state['message'] = '데이터 갱신 완료!'
+        if state.stopped or result is None:
+            state.message = '🛑 사용자에 의해 스캔이 중지되었습니다.'
         else:
-            state['message'] = '스캔 중 오류 발생'
-            
+            state.progress = 100.0
+            state.message = '데이터 갱신 완료!'
+
     except Exception as e:
-        state['message'] = f'오류: {str(e)}'
-        
+        state.message = f'오류: {str(e)}'
+
     finally:
-        state['is_running'] = False
+        state.is_running = False
+        _notify(state)
 
 
 @app.route('/')
@@ -155,7 +154,16 @@ def api_signals():
 @app.route('/api/investor')
 def api_investor():
     """기관/외국인/개인 순매수 TOP30"""
-    date = request.args.get('date', None)
+    date = request.args.get('date', None) or get_last_bday()
+    # YYYYMMDD 형식만 허용 (임의 문자열로 캐시를 채우거나 KRX 조회를 유발하지 않도록)
+    if not is_valid_date(date):
+        return jsonify({'ok': False, 'error': f'잘못된 날짜 형식입니다: {date} (YYYYMMDD)'}), 400
+
+    # 확정된 날짜는 snapshot_investor.py가 미리 저장해 둔 응답 파일을 그대로 전송
+    snapshot = investor_snapshot_name(date)
+    if os.path.exists(os.path.join(INVESTOR_SNAPSHOT_DIR, snapshot)):
+        return send_from_directory(INVESTOR_SNAPSHOT_DIR, snapshot, mimetype='application/json')
+
     try:
         data = get_investor_data(date)
         return jsonify({'ok': True, 'data': data})
@@ -173,9 +181,14 @@ def api_scan_start():
     if target_type not in scan_state:
         return jsonify({'ok': False, 'message': '잘못된 타겟입니다.'})
         
-    if scan_state[target_type]['is_running']:
+    if scan_state[target_type].is_running:
+        # 중지 요청 후에도 진행 중인 KRX 조회(타임아웃 없음)가 끝나야 스레드가 종료되므로 그 사이 재시작은 거절
+        if scan_state[target_type].stopped:
+            return jsonify({'ok': False, 'message': '이전 스캔을 중지하는 중입니다. 잠시 후 다시 시도하세요.'})
         return jsonify({'ok': False, 'message': '이미 스캔이 진행 중입니다.'})
-    
+
+    # 스레드 시작 전에 표시해 두어 직후 연결되는 스트림이 바로 종료되지 않게 함
+    scan_state[target_type].is_running = True
     thread = threading.Thread(target=run_scanner_bg, args=(target_type, target_date, top_n))
     thread.daemon = True
     thread.start()
@@ -192,18 +205,15 @@ def api_scan_stop():
         return jsonify({'ok': False, 'message': '잘못된 타겟입니다.'})
         
     state = scan_state[target_type]
-    if not state['is_running'] or state['process'] is None:
+    if not state.is_running:
         return jsonify({'ok': False, 'message': '실행 중인 스캔이 없습니다.'})
-        
-    try:
-        state['stopped'] = True
-        if state['process']:
-            state['process'].kill() # terminate보다 확실하게 즉시 종료
-        state['is_running'] = False # 즉시 상태를 변경하여 프론트엔드가 감지하게 함
-        return jsonify({'ok': True, 'message': '스캔을 중지합니다.'})
-    except Exception as e:
-        state['is_running'] = False # 에러가 나더라도 상태는 풀어서 다시 시작 가능하게 함
-        return jsonify({'ok': False, 'message': str(e)})
+
+    # 스캔 루프가 다음 종목으로 넘어가기 전에 플래그를 확인하고 종료함
+    # (진행 중인 종목 조회가 끝날 때까지 is_running 유지 → 그동안 /api/scan/start는 거절)
+    state.stopped = True
+    state.message = '🛑 중지 요청됨 - 진행 중인 조회가 끝나면 중지합니다...'
+    _notify(state)
+    return jsonify({'ok': True, 'message': '스캔을 중지합니다. 진행 중인 조회가 끝나면 다시 시작할 수 있습니다.'})
 
 
 @app.route('/api/scan/status', methods=['GET'])
@@ -212,17 +222,38 @@ def api_scan_status():
     if target_type not in scan_state:
         return jsonify({'ok': False, 'message': '잘못된 타겟입니다.'})
         
-    s = scan_state[target_type]
-    return jsonify({
-        'ok': True,
-        'data': {
-            'is_running': s['is_running'],
-            'progress': s['progress'],
-            'message': s['message'],
-            'signals_found': s['signals_found'],
-            'found_items': s['found_items']
-        }
-    })
+    return jsonify({'ok': True, 'data': scan_state[target_type].to_dict()})
+
+
+@app.route('/api/scan/stream', methods=['GET'])
+def api_scan_stream():
+    """스캔 상태를 Server-Sent Events로 전송 (상태가 바뀔 때만, 스캔 종료 시 스트림 종료)"""
+    target_type = request.args.get('target')
+    if target_type not in scan_state:
+        return jsonify({'ok': False, 'message': '잘못된 타겟입니다.'})
+
+    state = scan_state[target_type]
+
+    def generate():
+        last_version = None
+        while True:
+            with _scan_cond:
+                _scan_cond.wait_for(lambda: state.version != last_version, timeout=SSE_KEEPALIVE)
+                version = state.version
+                payload = state.to_dict()
+
+            if version == last_version:
+                yield ': keep-alive\n\n'
+                continue
+
+            last_version = version
+            yield f"data: {app.json.dumps(payload)}\n\n"
+            if not payload['is_running']:
+                break
+            time.sleep(SSE_MIN_INTERVAL)
+
+    return Response(generate(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
 
 
 @app.after_request
@@ -1,24 +1,32 @@
-import FinanceDataReader as fdr
 from pykrx import stock
 import pandas as pd
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timedelta
+from fetcher import (DATA_DIR, OHLCV_COLUMNS, ohlcv_dir, read_ohlcv, write_ohlcv, append_ohlcv,
+                     last_ohlcv_date, migrate_csv_store, RateLimiter, krx_request, stock_listing,
+                     ticker_lock)
 
 # 설정
-DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
 TOP_N = 0  # 0이면 전 종목 관리
+MAX_WORKERS = 12       # 동시 수집 스레드 수
+MAX_REQ_PER_SEC = 20   # KRX 요청 속도 상한 (서버 부하 방지)
+
+_limiter = RateLimiter(MAX_REQ_PER_SEC)
 
 def ensure_data_dir():
     if not os.path.exists(DATA_DIR):
         os.makedirs(DATA_DIR)
         print(f"📁 데이터 폴더 생성됨: {DATA_DIR}")
+    converted = migrate_csv_store()
+    if converted:
+        print(f"📦 연도별 parquet 저장소로 변환: {converted}개")
 
 def get_top_tickers(market, n):
     """시가총액 상위 종목 리스트 가져오기"""
     print(f"🔍 {market} 시가총액 상위 {n}개 추출 중...")
     try:
-        df = fdr.StockListing(market)
+        df = stock_listing(market)
         df = df.sort_values('Marcap', ascending=False)
         if n > 0:
             df = df.head(n)
@@ -28,14 +36,18 @@ def get_top_tickers(market, n):
         return []
 
 def collect_ohlcv(ticker, start_date, end_date):
-    """특정 종목의 OHLCV 데이터를 가져와서 CSV로 저장 (증분 업데이트 지원)"""
-    file_path = os.path.join(DATA_DIR, f"{ticker}.csv")
-    
+    """특정 종목의 OHLCV 데이터를 가져와서 연도별 parquet으로 저장 (증분 업데이트 지원)"""
+    # 대시보드 스캔(get_ohlcv)과 같은 종목 저장소를 동시에 쓰지 않도록 프로세스 간 잠금
+    with ticker_lock(ticker):
+        return _collect_ohlcv(ticker, start_date, end_date)
+
+
+def _collect_ohlcv(ticker, start_date, end_date):
     try:
         # 1. 기존 데이터 확인
-        if os.path.exists(file_path):
-            existing_df = pd.read_csv(file_path, index_col=0, parse_dates=True)
-            if not existing_df.empty:
+        if os.path.isdir(ohlcv_dir(ticker)):
+            existing_df = read_ohlcv(ticker)
+            if existing_df is not None and not existing_df.empty:
                 last_date = existing_df.index[-1]
                 target_end_dt = pd.to_datetime(end_date)
                 
@@ -45,28 +57,63 @@ def collect_ohlcv(ticker, start_date, end_date):
                 
                 # 부족한 부분만 가져오기
                 fetch_start = (last_date + timedelta(days=1)).strftime('%Y%m%d')
-                delta_df = stock.get_market_ohlcv(fetch_start, end_date, ticker)
+                delta_df = krx_request(stock.get_market_ohlcv, fetch_start, end_date, ticker,
+                                       limiter=_limiter)
                 
                 if delta_df is not None and not delta_df.empty:
                     # 인덱스 이름(날짜) 맞추기
                     delta_df.index.name = existing_df.index.name
-                    updated_df = pd.concat([existing_df, delta_df])
-                    updated_df.to_csv(file_path, encoding='utf-8-sig')
+                    append_ohlcv(ticker, delta_df)
                     return True
                 else:
                     return True # 추가 데이터 없음 (휴장일 등)
 
         # 2. 데이터가 없으면 통째로 가져오기
-        df = stock.get_market_ohlcv(start_date, end_date, ticker)
+        df = krx_request(stock.get_market_ohlcv, start_date, end_date, ticker, limiter=_limiter)
         if df is None or df.empty:
             return False
         
-        df.to_csv(file_path, encoding='utf-8-sig')
+        write_ohlcv(ticker, df)
         return True
     except Exception as e:
         print(f"   - {ticker} 실패: {e}")
         return False
 
+def update_by_date(market, last_dates, end_date):
+    """
+    이미 저장된 종목들의 부족한 일봉을 날짜별 전 종목 시세(get_market_ohlcv_by_ticker)로 채움
+    - 종목 수와 무관하게 부족한 영업일 수만큼만 요청
+    - last_dates: {종목코드: 마지막 저장일}
+    반환: 업데이트 대상이었던 종목 집합
+    """
+    from_date = (min(last_dates.values()) + timedelta(days=1)).strftime('%Y%m%d')
+    if from_date > end_date:
+        return set(last_dates)
+
+    days = stock.get_previous_business_days(fromdate=from_date, todate=end_date)
+    rows = {t: [] for t in last_dates}
+    for i, day in enumerate(days, 1):
+        day_df = krx_request(stock.get_market_ohlcv_by_ticker, day.strftime('%Y%m%d'),
+                             market=market, limiter=_limiter)
+        if day_df is None or day_df.empty:
+            # 영업일인데 시세가 비었으면 요청 실패/차단으로 간주. 이후 날짜를 쓰면 저장소에
+            # 영구적인 구멍이 생기므로 여기서 멈추고, 남은 기간은 다음 실행에서 다시 채움
+            print(f"\n[{market}] {day:%Y-%m-%d} 일별 시세 없음 - 이전 날짜까지만 저장")
+            break
+        for ticker in day_df.index.intersection(list(last_dates)):
+            if last_dates[ticker] < day:
+                rows[ticker].append(day_df.loc[ticker, OHLCV_COLUMNS].rename(day))
+        print(f"[{market}] 일별 시세 {i}/{len(days)} {day:%Y-%m-%d}", end='\r')
+
+    for ticker, day_rows in rows.items():
+        if day_rows:
+            delta_df = pd.DataFrame(day_rows)
+            delta_df.index.name = '날짜'
+            with ticker_lock(ticker):
+                append_ohlcv(ticker, delta_df)
+    return set(last_dates)
+
+
 def run_collection(n=TOP_N):
     ensure_data_dir()
     
@@ -78,13 +125,31 @@ def run_collection(n=TOP_N):
     
     for market in ['KOSPI', 'KOSDAQ']:
         tickers = get_top_tickers(market, n)
+
+        # 1. 저장된 종목의 증분은 날짜별 전 종목 시세로 일괄 업데이트
+        #    (부족한 영업일 수가 종목 수보다 적을 때만 유리)
+        last_dates = {t: last_ohlcv_date(t) for t in tickers}
+        stored = {t: d for t, d in last_dates.items() if d is not None}
+        done = set()
+        if stored:
+            gap_days = len(pd.bdate_range(min(stored.values()), end_date)) - 1
+            if gap_days < len(stored):
+                try:
+                    done = update_by_date(market, stored, end_date)
+                    print(f"\n[{market}] 일별 증분 업데이트 완료 ({len(done)}개 종목)")
+                except Exception as e:
+                    print(f"\n[{market}] 일별 증분 업데이트 실패, 종목별 수집으로 대체: {e}")
+
+        # 2. 신규 종목(전체 히스토리) 및 나머지는 종목별로 수집
+        tickers = [t for t in tickers if t not in done]
         total = len(tickers)
-        
-        for i, ticker in enumerate(tickers, 1):
-            success = collect_ohlcv(ticker, start_date, end_date)
-            status = "✅" if success else "❌"
-            print(f"[{market}] {i}/{total} {ticker} {status}", end='\r')
-            time.sleep(0.05)  # 서버 부하 방지용 미세 지연
+
+        # 네트워크 대기 위주 작업이므로 스레드로 병렬 수집 (요청 속도는 _limiter로 제한)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            futures = {pool.submit(collect_ohlcv, t, start_date, end_date): t for t in tickers}
+            for i, future in enumerate(as_completed(futures), 1):
+                status = "✅" if future.result() else "❌"
+                print(f"[{market}] {i}/{total} {futures[future]} {status}", end='\r')
         print(f"\n[{market}] 수집 완료!")
 
 if __name__ == '__main__':
@@ -15,5 +15,8 @@ echo "🚀 데이터 업데이트 시작..."
 # collector 실행 (n=0 은 전 종목 의미)
 /usr/bin/python3 collector.py --n 0 >> collector.log 2>&1
 
+# 전 영업일 투자자별 순매수 스냅샷 저장 (/api/investor 에서 그대로 전송)
+/usr/bin/python3 snapshot_investor.py >> collector.log 2>&1
+
 echo "✅ 업데이트 완료: $(date)"
 echo "--------------------------------------------------"
@@ -1,54 +1,332 @@
 """
 주식 스크리닝 데이터 페처
-- 신호 데이터: 사전 계산 CSV 로드
+- 신호 데이터: 사전 계산 CSV 로드 (숫자는 원본 값, 표시 포맷은 프론트엔드 담당)
 - 투자자 순매수: KRX 데이터포털 직접 요청
 """
 
+from __future__ import annotations
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import glob
 import json
+import shutil
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache
 from pykrx import stock as krx
+import FinanceDataReader as fdr
 import os
+try:
+    import fcntl  # 프로세스 간 파일 잠금 (macOS/Linux)
+except ImportError:
+    fcntl = None
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 DATA_DIR = os.path.join(BASE_DIR, 'data')
+INVESTOR_SNAPSHOT_DIR = os.path.join(DATA_DIR, 'investor')  # 장 마감 후 확정된 투자자 데이터 ({YYYYMMDD}.json)
 
 # ──────────────────────────────────────────────
 # 유틸
 # ──────────────────────────────────────────────
 def get_last_bday() -> str:
-    """가장 최근 영업일 날짜 반환 (YYYYMMDD)"""
-    d = datetime.now()
-    # 토/일이면 전 금요일로
-    while d.weekday() >= 5:
-        d -= timedelta(days=1)
-    # 오전 9시 이전이면 하루 더 뒤로
-    if datetime.now().hour < 9:
+    """가장 최근 영업일 날짜 반환 (YYYYMMDD, 60초 단위로 캐시)"""
+    return _last_bday(int(time.time() // 60))
+
+
+@lru_cache(maxsize=1)
+def _last_bday(_minute_bucket: int) -> str:
+    now = datetime.now()
+    d = now.date()
+    # 오전 9시 이전이면 하루 뒤로
+    if now.hour < 9:
         d -= timedelta(days=1)
-        while d.weekday() >= 5:
-            d -= timedelta(days=1)
+    # 토/일이면 전 금요일로 (토: -1일, 일: -2일)
+    wd = d.weekday()
+    if wd >= 5:
+        d -= timedelta(days=wd - 4)
     return d.strftime('%Y%m%d')
 
 
+class RateLimiter:
+    """여러 스레드가 공유하는 호출 속도 제한 (초당 최대 rate회)"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+KRX_RETRIES = 5
+
+
+def krx_request(fn, *args, limiter: RateLimiter | None = None, retries: int = KRX_RETRIES, **kwargs):
+    """
+    pykrx 호출 래퍼: 평소엔 대기 없이(limiter가 있으면 속도 제한만) 호출하고,
+    예외가 난 경우에만 min(30, 0.5·2^n)초 지수 백오프 후 재시도. 마지막 실패는 그대로 raise
+    """
+    for attempt in range(retries):
+        if limiter is not None:
+            limiter.wait()
+        try:
+            return fn(*args, **kwargs)
+        except Exception:
+            if attempt == retries - 1:
+                raise
+            time.sleep(min(30, 0.5 * 2 ** attempt))
+
+
+# pykrx는 호출마다 requests.get/post로 새 연결을 맺으므로, keep-alive 세션을 공유하도록 교체
+# (수집 스레드 수만큼 커넥션 풀 확보. 재시도는 krx_request에서 처리)
+_PYKRX_SESSION = requests.Session()
+for _scheme in ('http://', 'https://'):
+    _PYKRX_SESSION.mount(_scheme, HTTPAdapter(pool_connections=4, pool_maxsize=16))
+
+try:
+    from pykrx.website.comm import webio as _pykrx_webio
+    _pykrx_webio.requests = _PYKRX_SESSION   # Get/Post.read()가 requests.get/post를 모듈 속성으로 호출
+except (ImportError, AttributeError):
+    pass  # pykrx 내부 구조가 다른 버전이면 기본 동작 유지
+
+
+def _to_records(df: pd.DataFrame) -> list[dict]:
+    """df.to_dict(orient='records')와 같은 결과를 배열에서 바로 생성 (작은 프레임용 경량 경로)"""
+    cols = df.columns.tolist()
+    return [dict(zip(cols, row)) for row in df.to_numpy(dtype=object)]
+
+
+# 상장 종목 목록 (fdr.StockListing) 일 단위 캐시: data/listing/{시장}_{YYYYMMDD}.parquet
+LISTING_DIR = os.path.join(DATA_DIR, 'listing')
+LISTING_COLUMNS = ['Code', 'Name', 'Market', 'Marcap', 'Close']   # 스캐너/수집기가 쓰는 컬럼만 보관
+
+
+def stock_listing(market: str) -> pd.DataFrame:
+    """fdr.StockListing(market)을 하루 한 번만 조회 (프로세스 내 캐시 + 당일 디스크 캐시)"""
+    return _stock_listing(market, datetime.now().strftime('%Y%m%d')).copy()
+
+
+@lru_cache(maxsize=4)
+def _stock_listing(market: str, day: str) -> pd.DataFrame:
+    path = os.path.join(LISTING_DIR, f"{market}_{day}.parquet")
+    if os.path.exists(path):
+        try:
+            return pd.read_parquet(path)
+        except:
+            pass
+
+    df = fdr.StockListing(market)
+    df = df[[c for c in LISTING_COLUMNS if c in df.columns]]   # 업종/주소 등 미사용 컬럼 제거
+    try:
+        os.makedirs(LISTING_DIR, exist_ok=True)
+        for old in glob.glob(os.path.join(LISTING_DIR, f"{market}_*.parquet")):
+            os.remove(old)   # 지난 날짜 캐시 정리
+        df.to_parquet(path)
+    except:
+        pass  # 캐시 저장 실패는 무시 (다음 실행에서 다시 조회)
+    return df
+
+
+@lru_cache(maxsize=1)
+def _ticker_name_map() -> dict[str, str]:
+    """{종목코드: 종목명} - KRX 전체 상장 목록을 프로세스당 한 번만 조회"""
+    df = stock_listing('KRX')
+    return dict(zip(df['Code'], df['Name']))
+
+
+# get_ohlcv의 KRX 조회 속도 상한 (스캐너가 여러 스레드로 호출해도 전체 합산 기준)
+OHLCV_REQ_PER_SEC = 10
+_ohlcv_limiter = RateLimiter(OHLCV_REQ_PER_SEC)
+
+
 def ticker_name(code: str) -> str:
     try:
-        return krx.get_market_ticker_name(code)
+        return _ticker_name_map().get(code, code)
     except:
         return code
 
 
-def get_ohlcv(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
-    """로컬 데이터에서 OHLCV를 가져오고 부족한 부분만 업데이트"""
-    file_path = os.path.join(DATA_DIR, f"{ticker}.csv")
-    
-    # 1. 로컬 파일 확인
-    local_df = None
-    if os.path.exists(file_path):
+# ──────────────────────────────────────────────
+# OHLCV 로컬 저장소 (data/{ticker}/year={YYYY}/part.parquet)
+# - 연도별로 나눠 저장해 일별 증분 업데이트 시 올해 파일 하나만 다시 씀
+# ──────────────────────────────────────────────
+OHLCV_COLUMNS = ['시가', '고가', '저가', '종가', '거래량']
+# 원 단위 가격은 int32로 충분 (정확값 유지, 메모리/디스크 절반). 거래량은 int32를 넘을 수 있어 int64 유지
+OHLCV_DTYPES = {'시가': 'int32', '고가': 'int32', '저가': 'int32', '종가': 'int32', '거래량': 'int64'}
+
+
+def _downcast(df: pd.DataFrame) -> pd.DataFrame:
+    """모든 값이 정수이고 int32 범위 안일 때만 정수형으로 변환 (소수/결측이 있으면 원본 dtype 유지)"""
+    try:
+        values = df[OHLCV_COLUMNS]
+        # astype은 소수점을 말없이 버리므로 미리 확인 (NaN % 1 == 0 은 False)
+        if not (values % 1 == 0).all().all():
+            return df
+        if values[list(OHLCV_DTYPES)[:4]].abs().max().max() >= 2**31:
+            return df
+        return df.astype(OHLCV_DTYPES)
+    except (KeyError, ValueError, TypeError):
+        return df
+
+
+def ohlcv_dir(ticker: str) -> str:
+    return os.path.join(DATA_DIR, ticker)
+
+
+def _partition_path(ticker: str, year: int) -> str:
+    return os.path.join(ohlcv_dir(ticker), f"year={year}", "part.parquet")
+
+
+def _convert_legacy(ticker: str) -> bool:
+    """예전 단일 파일 저장본(data/{ticker}.csv / .parquet)이 있으면 연도 파티션으로 변환 후 삭제"""
+    for ext in ('.parquet', '.csv'):
+        legacy_path = os.path.join(DATA_DIR, f"{ticker}{ext}")
+        if not os.path.exists(legacy_path):
+            continue
         try:
-            local_df = pd.read_csv(file_path, index_col=0, parse_dates=True)
+            if ext == '.csv':
+                df = pd.read_csv(legacy_path, index_col=0, parse_dates=True, encoding='utf-8-sig')
+            else:
+                df = pd.read_parquet(legacy_path)
+            write_ohlcv(ticker, df)
+            os.remove(legacy_path)
+            return True
         except:
-            local_df = None
+            return False
+    return False
+
+
+def migrate_csv_store() -> int:
+    """data/ 폴더의 단일 파일 저장본을 일괄 연도 파티션으로 변환. 변환한 종목 수 반환"""
+    if not os.path.exists(DATA_DIR):
+        return 0
+    tickers = {os.path.splitext(f)[0] for f in os.listdir(DATA_DIR) if f.endswith(('.csv', '.parquet'))}
+    return sum(_convert_legacy(t) for t in tickers)
+
+
+def read_ohlcv(ticker: str) -> pd.DataFrame | None:
+    """로컬 OHLCV 읽기 (필요한 컬럼만). 없거나 읽기 실패 시 None"""
+    if not os.path.isdir(ohlcv_dir(ticker)) and not _convert_legacy(ticker):
+        return None
+    try:
+        parts = sorted(glob.glob(_partition_path(ticker, '*')))
+        if not parts:
+            return None
+        return _downcast(pd.concat([pd.read_parquet(p, columns=OHLCV_COLUMNS) for p in parts]))
+    except:
+        return None
+
+
+def last_ohlcv_date(ticker: str) -> pd.Timestamp | None:
+    """로컬에 저장된 마지막 일자 (마지막 연도 파티션만 읽음). 없으면 None"""
+    if not os.path.isdir(ohlcv_dir(ticker)) and not _convert_legacy(ticker):
+        return None
+    parts = sorted(glob.glob(_partition_path(ticker, '*')))
+    if not parts:
+        return None
+    try:
+        return pd.read_parquet(parts[-1], columns=['종가']).index.max()
+    except:
+        return None
+
+
+def write_ohlcv(ticker: str, df: pd.DataFrame) -> None:
+    """종목 전체 히스토리를 연도 파티션으로 새로 저장 (기존 파티션 교체)"""
+    # 옆 임시 폴더에 전부 쓴 뒤 폴더째 교체 → 도중에 죽어도 기존 히스토리가 잘린 채 남지 않음
+    final_dir = ohlcv_dir(ticker)
+    suffix = f"{os.getpid()}.{threading.get_ident()}"
+    tmp_dir = os.path.join(DATA_DIR, f".{ticker}.{suffix}.tmp")
+    old_dir = os.path.join(DATA_DIR, f".{ticker}.{suffix}.old")
+    df = df[OHLCV_COLUMNS]
+    try:
+        for year, part in df.groupby(df.index.year):
+            path = os.path.join(tmp_dir, f"year={year}", "part.parquet")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _downcast(part[~part.index.duplicated(keep='last')]).to_parquet(path, compression='zstd')
+        if os.path.isdir(final_dir):
+            os.replace(final_dir, old_dir)
+        os.replace(tmp_dir, final_dir)
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+
+def append_ohlcv(ticker: str, delta_df: pd.DataFrame) -> None:
+    """새 일봉을 해당 연도 파티션에만 추가 (같은 날짜는 새 값으로 덮어씀)"""
+    delta_df = delta_df[OHLCV_COLUMNS]
+    for year, part in delta_df.groupby(delta_df.index.year):
+        path = _partition_path(ticker, year)
+        if os.path.exists(path):
+            existing = pd.read_parquet(path)
+            part = pd.concat([existing, part.rename_axis(existing.index.name)])
+            part = part[~part.index.duplicated(keep='last')]
+        else:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 임시 파일에 쓴 뒤 교체 (다른 프로세스가 쓰는 도중의 파일을 읽지 않도록)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            _downcast(part).to_parquet(tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def has_ohlcv(ticker: str) -> bool:
+    """로컬 저장소에 연도 파티션이 하나라도 있는지 (읽기 성공 여부와 무관)"""
+    return bool(glob.glob(_partition_path(ticker, '*')))
+
+
+# 종목별 저장소 잠금
+# - 같은 프로세스의 스캔 스레드끼리: threading.Lock
+# - 대시보드와 cron 수집기 등 다른 프로세스끼리: data/.locks/{ticker}.lock 에 fcntl.flock
+_TICKER_LOCKS: dict[str, threading.Lock] = {}
+_TICKER_LOCKS_GUARD = threading.Lock()
+LOCK_DIR = os.path.join(DATA_DIR, '.locks')
+
+
+def _thread_lock(ticker: str) -> threading.Lock:
+    with _TICKER_LOCKS_GUARD:
+        return _TICKER_LOCKS.setdefault(ticker, threading.Lock())
+
+
+@contextmanager
+def ticker_lock(ticker: str):
+    """종목 저장소 읽기-수정-쓰기 구간 잠금 (스레드 + 프로세스 간)"""
+    with _thread_lock(ticker):
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(LOCK_DIR, exist_ok=True)
+        with open(os.path.join(LOCK_DIR, f"{ticker}.lock"), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def get_ohlcv(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    """로컬 데이터에서 OHLCV를 가져오고 부족한 부분만 업데이트 (스레드/프로세스 안전)"""
+    with ticker_lock(ticker):
+        return _get_ohlcv(ticker, start_date, end_date)
+
+
+def _get_ohlcv(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+    # 1. 로컬 파일 확인
+    local_df = read_ohlcv(ticker)
 
     # 2. 부족한 데이터 판단
     target_end_dt = pd.to_datetime(end_date)
@@ -63,21 +341,25 @@ def get_ohlcv(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
         # 부족하면 오늘치만 추가로 받기
         try:
             fetch_start = (last_date + timedelta(days=1)).strftime('%Y%m%d')
-            delta_df = krx.get_market_ohlcv(fetch_start, end_date, ticker)
-            if delta_df is not None and not delta_df.empty:
-                new_df = pd.concat([local_df, delta_df])
-                new_df.to_csv(file_path, encoding='utf-8-sig')
-                return new_df[start_date:end_date]
+            delta_df = krx_request(krx.get_market_ohlcv, fetch_start, end_date, ticker,
+                                   limiter=_ohlcv_limiter)
+            if delta_df is None or delta_df.empty:
+                # 새 거래일 없음 (휴장일/장 시작 전) - 전체를 다시 받지 않고 로컬 그대로 사용
+                return local_df[start_date:end_date]
+            delta_df.index.name = local_df.index.name
+            append_ohlcv(ticker, delta_df)
+            new_df = pd.concat([local_df, _downcast(delta_df[OHLCV_COLUMNS])])
+            return new_df[start_date:end_date]
         except:
             pass
             
     # 3. 데이터가 없거나 업데이트 실패 시 통째로 받기 (기존 방식)
     try:
-        df = krx.get_market_ohlcv(start_date, end_date, ticker)
+        df = krx_request(krx.get_market_ohlcv, start_date, end_date, ticker, limiter=_ohlcv_limiter)
         # 받은 김에 저장 (백그라운드 수집을 도와줌)
-        if df is not None and not df.empty:
-            if not os.path.exists(DATA_DIR): os.makedirs(DATA_DIR)
-            df.to_csv(file_path, encoding='utf-8-sig')
+        # 단, 기존 파티션이 있는데 읽기/증분 조회만 실패한 경우엔 더 긴 기존 히스토리를 지우지 않음
+        if df is not None and not df.empty and not has_ohlcv(ticker):
+            write_ohlcv(ticker, df)
         return df
     except:
         return None
@@ -86,20 +368,32 @@ def get_ohlcv(ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
 # ──────────────────────────────────────────────
 # 1~3: 신호 데이터 (CSV 로드)
 # ──────────────────────────────────────────────
+# {path: (mtime, records)} - 파일이 바뀌지 않았으면 파싱 결과 재사용
+_CSV_CACHE: dict[str, tuple[float, list[dict]]] = {}
+
+
 def load_csv(filename: str) -> list[dict]:
     path = os.path.join(BASE_DIR, filename)
-    if not os.path.exists(path):
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
         return []
+
+    cached = _CSV_CACHE.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+
     try:
         df = pd.read_csv(path, encoding='utf-8-sig')
         df = df.fillna('-')
-        # 숫자 컬럼 콤마 포맷
-        for col in df.select_dtypes(include='number').columns:
-            df[col] = df[col].apply(lambda x: f"{x:,.0f}" if isinstance(x, (int, float)) else x)
-        return df.to_dict(orient='records')
+        # 숫자는 원본 값 그대로 전달 (콤마 포맷은 화면에서 처리)
+        records = _to_records(df)
     except:
         return []
 
+    _CSV_CACHE[path] = (mtime, records)
+    return records
+
 
 def get_signals() -> dict:
     return {
@@ -129,11 +423,40 @@ INVESTOR_CODES = {
     '개인': '1000',
 }
 
+# KRX 연결 재사용 (keep-alive). 커넥션 풀은 스레드 간 공유 가능
+_KRX_SESSION = requests.Session()
+_KRX_SESSION.headers.update(KRX_HEADERS)
+_KRX_SESSION.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=8,
+                                          max_retries=Retry(total=2, backoff_factor=0.3)))
+
 MKT_CODES = {
     'KOSPI': 'STK',
     'KOSDAQ': 'KSQ',
 }
 
+# 투자자별 순매수 상위종목(MDCSTAT02402) 응답 헤더 → 화면 컬럼명
+KRX_COL_MAP = {
+    'ISU_SRT_CD':    '종목코드',
+    'ISU_NM':        '종목명',
+    'ISU_ABBRV':     '종목명',
+    'NETBID_TRDVOL': '순매수거래량',
+    'NETBID_TRDVAL': '순매수거래대금',
+    '종목코드':       '종목코드',
+    '종목명':         '종목명',
+    '순매수거래량':    '순매수거래량',
+    '순매수거래대금':  '순매수거래대금',
+}
+
+# 당일(장중) 데이터 캐시 유지 시간 (초). 지난 영업일 데이터는 바뀌지 않으므로 만료 없음
+INVESTOR_TTL_TODAY = 300
+
+# 캐시 최대 항목 수 (날짜 x 시장 2 x 투자자 3). 넘치면 만료된 항목 → 가장 오래 안 쓴 항목 순으로 제거
+INVESTOR_CACHE_MAX = 240
+
+# {(date, market, investor, top_n): (만료시각 or None, records)} - 최근 사용 순서 유지 (LRU)
+_INVESTOR_CACHE: OrderedDict[tuple, tuple[float | None, list[dict]]] = OrderedDict()
+_INVESTOR_CACHE_LOCK = threading.Lock()
+
 
 def fetch_investor_data(date: str, market: str, investor: str, top_n: int = 30) -> list[dict]:
     """KRX에서 투자자별 순매수 상위 종목 조회"""
@@ -152,7 +475,7 @@ def fetch_investor_data(date: str, market: str, investor: str, top_n: int = 30)
     }
 
     try:
-        resp = requests.post(KRX_URL, data=params, headers=KRX_HEADERS, timeout=10)
+        resp = _KRX_SESSION.post(KRX_URL, data=params, timeout=10)
         data = resp.json()
         items = data.get('output', [])
         if not items:
@@ -160,14 +483,16 @@ def fetch_investor_data(date: str, market: str, investor: str, top_n: int = 30)
 
         # 순매수거래량 기준 상위 N개
         df = pd.DataFrame(items)
-        # 컬럼명 정규화
+        # 컬럼명 정규화 (알려진 헤더는 테이블 조회, 모르는 헤더만 문자열 검사)
         col_map = {}
         for col in df.columns:
+            if col in KRX_COL_MAP:
+                continue
             if '종목' in col and '코드' in col: col_map[col] = '종목코드'
             elif '종목' in col and ('명' in col or '이름' in col): col_map[col] = '종목명'
             elif '순매수' in col and '거래량' in col: col_map[col] = '순매수거래량'
             elif '순매수' in col and '거래대금' in col: col_map[col] = '순매수거래대금'
-        df = df.rename(columns=col_map)
+        df = df.rename(columns={**KRX_COL_MAP, **col_map})
 
         # 순매수거래량 숫자 변환
         if '순매수거래량' in df.columns:
@@ -175,22 +500,56 @@ def fetch_investor_data(date: str, market: str, investor: str, top_n: int = 30)
                 df['순매수거래량'].astype(str).str.replace(',', ''), errors='coerce'
             )
             df = df.sort_values('순매수거래량', ascending=False).head(top_n)
-            df['순매수거래량'] = df['순매수거래량'].apply(lambda x: f"{x:,.0f}" if pd.notna(x) else '-')
 
-        return df.fillna('-').to_dict(orient='records')
+        return _to_records(df.fillna('-'))
     except Exception as e:
         print(f"[KRX 오류] {investor} {market}: {e}")
         return []
 
 
+def fetch_investor_data_cached(date: str, market: str, investor: str, top_n: int = 30) -> list[dict]:
+    """fetch_investor_data 결과를 (date, market, investor, top_n) 단위로 캐시"""
+    key = (date, market, investor, top_n)
+    now = time.time()
+
+    with _INVESTOR_CACHE_LOCK:
+        cached = _INVESTOR_CACHE.get(key)
+        if cached is not None:
+            expires_at, records = cached
+            if expires_at is None or now < expires_at:
+                _INVESTOR_CACHE.move_to_end(key)
+                return records
+
+    records = fetch_investor_data(date, market, investor, top_n)
+    # 빈 결과(KRX 오류/차단)는 캐시하지 않고 다음 요청에서 재시도
+    if records:
+        expires_at = None if date < get_last_bday() else now + INVESTOR_TTL_TODAY
+        with _INVESTOR_CACHE_LOCK:
+            _INVESTOR_CACHE[key] = (expires_at, records)
+            _INVESTOR_CACHE.move_to_end(key)
+            if len(_INVESTOR_CACHE) > INVESTOR_CACHE_MAX:
+                for k in [k for k, (exp, _) in _INVESTOR_CACHE.items() if exp is not None and exp <= now]:
+                    del _INVESTOR_CACHE[k]
+            while len(_INVESTOR_CACHE) > INVESTOR_CACHE_MAX:
+                _INVESTOR_CACHE.popitem(last=False)
+    return records
+
+
+def investor_snapshot_name(date: str) -> str:
+    return f"{date}.json"
+
+
 def get_investor_data(date: str = None) -> dict:
     if not date:
         date = get_last_bday()
 
+    # 시장 × 투자자 6건은 서로 독립적인 HTTP 요청이므로 동시에 조회
+    pairs = [(market, inv) for market in ['KOSPI', 'KOSDAQ'] for inv in ['기관', '외국인', '개인']]
+    with ThreadPoolExecutor(max_workers=len(pairs)) as pool:
+        fetched = pool.map(lambda p: fetch_investor_data_cached(date, *p), pairs)
+
     result = {'date': date, 'data': {}}
-    for market in ['KOSPI', 'KOSDAQ']:
-        result['data'][market] = {}
-        for inv in ['기관', '외국인', '개인']:
-            result['data'][market][inv] = fetch_investor_data(date, market, inv)
+    for (market, inv), records in zip(pairs, fetched):
+        result['data'].setdefault(market, {})[inv] = records
 
     return result
@@ -9,14 +9,18 @@ KOSPI 시가총액 상위 500개 + KOSDAQ 시가총액 상위 500개
 
 데이터:
   - 종목 리스트+시가총액: FinanceDataReader (KRX 기반)
-  - OHLCV 히스토리     : pykrx (KRX 공식)
+  - OHLCV 히스토리     : data/ 로컬 저장소 우선, 없는 종목은 pykrx 일별 전 종목 시세로 일괄 조회
   - 200일 MA 산출을 위해 약 300 캘린더일(2025-03-01~2026-02-20) 수집
 """
 
-import FinanceDataReader as fdr
+from __future__ import annotations
 from pykrx import stock
 import pandas as pd
+import numpy as np
 import time
+from concurrent.futures import ThreadPoolExecutor
+from fetcher import OHLCV_COLUMNS, RateLimiter, krx_request, read_ohlcv, stock_listing, ticker_lock
+from strategy_golden_pullback import rolling_mean
 
 # ──────────────────────────────────────────────
 # 설정
@@ -25,13 +29,18 @@ TOP_N       = 500
 BASE_DATE   = '20260220'   # 기준일 (2/20 종가)
 START_DATE  = '20250101'   # 200일 MA를 충분히 계산하기 위한 시작일
 GC_WINDOW   = 5            # 최근 N 영업일 이내 골든크로스 탐지
-SLEEP_SEC   = 0.3
+MAX_WORKERS = 8            # 일별 시세 동시 조회 스레드 수
+MAX_REQ_PER_SEC = 10       # KRX 요청 속도 상한
+
+_limiter = RateLimiter(MAX_REQ_PER_SEC)
+
+RESULT_COLUMNS = ['종목명', '시가총액(억원)', '종가', 'MA20', 'MA200', 'MA20_MA200갭(%)', '골든크로스일']
 
 # ──────────────────────────────────────────────
 # 함수: 시가총액 상위 N개 종목 추출 (fdr)
 # ──────────────────────────────────────────────
 def get_top_tickers(market: str, n: int) -> pd.DataFrame:
-    df = fdr.StockListing(market)
+    df = stock_listing(market)
     df = df.sort_values('Marcap', ascending=False).head(n).copy()
     df['시가총액(억원)'] = (df['Marcap'] / 1e8).astype(int)
     df = df.rename(columns={'Code': '종목코드', 'Name': '종목명', 'Close': '종가'})
@@ -41,82 +50,108 @@ def get_top_tickers(market: str, n: int) -> pd.DataFrame:
 
 
 # ──────────────────────────────────────────────
-# 함수: 골든크로스 탐지
+# 함수: OHLCV 패널 로드 (날짜 × (컬럼, 종목))
 # ──────────────────────────────────────────────
-def find_golden_cross(tickers: list, top_df: pd.DataFrame,
+def _fetch_day(day: pd.Timestamp, market: str) -> pd.DataFrame | None:
+    """영업일 하루치 전 종목 시세. 재시도 후에도 실패하거나 비어 있으면 None"""
+    try:
+        df = krx_request(stock.get_market_ohlcv_by_ticker, day.strftime('%Y%m%d'),
+                         market=market, limiter=_limiter)
+    except Exception:
+        return None
+    if df is None or df.empty:
+        return None
+    df = df[OHLCV_COLUMNS].copy()
+    df['날짜'] = day
+    return df
+
+
+def load_panel(market: str, tickers: list, start: str, end: str) -> pd.DataFrame:
+    """
+    종목별 OHLCV를 (컬럼, 종목) MultiIndex 컬럼의 넓은 DataFrame으로 반환.
+    - 로컬 저장소가 end까지 채워진 종목은 그대로 사용
+    - 나머지는 영업일별 전 종목 시세(get_market_ohlcv_by_ticker)로 한 번에 받아 pivot
+      → 요청 수가 종목 수가 아니라 영업일 수(~300)에 비례
+    """
+    end_dt = pd.to_datetime(end)
+    frames = {}
+    missing = []
+    for t in tickers:
+        with ticker_lock(t):  # 수집기가 저장소를 교체하는 도중에 읽지 않도록
+            df = read_ohlcv(t)
+        if df is not None and not df.empty and df.index[-1] >= end_dt:
+            frames[t] = df.loc[start:end, OHLCV_COLUMNS]
+        else:
+            missing.append(t)
+
+    panel = pd.concat(frames, axis=1).swaplevel(axis=1) if frames else None
+
+    if missing:
+        print(f"  로컬 저장소에 없는 {len(missing)}개 종목 → 영업일별 전 종목 시세 조회")
+        days = stock.get_previous_business_days(fromdate=start, todate=end)
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            by_day = dict(zip(days, pool.map(lambda d: _fetch_day(d, market), days)))
+
+        # 영업일 시세가 비면 요청 실패로 간주: 한 번 더 순차 조회하고, 그래도 빠지면 중단
+        # (빠진 날은 전 종목이 NaN 행이 되어 MA200이 200행 동안 NaN → 종목이 조용히 누락됨)
+        for day in [d for d, df in by_day.items() if df is None]:
+            by_day[day] = _fetch_day(day, market)
+        failed = [d.strftime('%Y-%m-%d') for d, df in by_day.items() if df is None]
+        if failed:
+            raise RuntimeError(f"[{market}] 영업일 시세 조회 실패 ({len(failed)}일): {', '.join(failed)}")
+
+        day_dfs = list(by_day.values())
+        if day_dfs:
+            long_df = pd.concat(day_dfs)
+            long_df = long_df[long_df.index.isin(missing)]
+            long_df.index.name = '티커'
+            fetched = long_df.reset_index().pivot(index='날짜', columns='티커', values=OHLCV_COLUMNS)
+            panel = fetched if panel is None else panel.join(fetched, how='outer')
+
+    return panel if panel is not None else pd.DataFrame()
+
+
+# ──────────────────────────────────────────────
+# 함수: 골든크로스 탐지 (전 종목 한 번에)
+# ──────────────────────────────────────────────
+def find_golden_cross(market: str, tickers: list, top_df: pd.DataFrame,
                       start: str, end: str, gc_window: int) -> pd.DataFrame:
-    golden_list = []
-    dead_list   = []   # 현재 MA20 > MA200이지만 최근 크로스 아닌 것
-    total = len(tickers)
-
-    for i, ticker in enumerate(tickers, 1):
-        try:
-            df = stock.get_market_ohlcv(start, end, ticker)
-            if df is None or df.empty or len(df) < 200:
-                if (i % 50 == 0 or i == total):
-                    print(f"  [{i:>3}/{total}] {i/total*100:5.1f}% 완료...")
-                time.sleep(SLEEP_SEC)
-                continue
-
-            close = df['종가']
-            ma20  = close.rolling(20).mean()
-            ma200 = close.rolling(200).mean()
-
-            # 최근 유효 데이터 (마지막 gc_window+1일)
-            recent_ma20  = ma20.iloc[-(gc_window+1):]
-            recent_ma200 = ma200.iloc[-(gc_window+1):]
-
-            # 골든크로스: 최근 gc_window일 중 MA20이 MA200을 상향 돌파한 시점 존재?
-            cross_occurred = False
-            cross_date = None
-            for j in range(1, len(recent_ma20)):
-                prev20, curr20 = recent_ma20.iloc[j-1], recent_ma20.iloc[j]
-                prev200, curr200 = recent_ma200.iloc[j-1], recent_ma200.iloc[j]
-                if pd.isna(prev20) or pd.isna(curr20) or pd.isna(prev200) or pd.isna(curr200):
-                    continue
-                if prev20 <= prev200 and curr20 > curr200:
-                    cross_occurred = True
-                    cross_date = recent_ma20.index[j].strftime('%Y-%m-%d')
-                    break
-
-            last_ma20  = ma20.iloc[-1]
-            last_ma200 = ma200.iloc[-1]
-            last_close = close.iloc[-1]
-
-            if pd.isna(last_ma20) or pd.isna(last_ma200):
-                if (i % 50 == 0 or i == total):
-                    print(f"  [{i:>3}/{total}] {i/total*100:5.1f}% 완료...")
-                time.sleep(SLEEP_SEC)
-                continue
-
-            row = {
-                '종목명':      top_df.loc[ticker, '종목명'],
-                '시가총액(억원)': top_df.loc[ticker, '시가총액(억원)'],
-                '종가':        int(last_close),
-                'MA20':        round(last_ma20),
-                'MA200':       round(last_ma200),
-                'MA20_MA200갭(%)': round((last_ma20/last_ma200 - 1)*100, 2),
-                '골든크로스일': cross_date if cross_occurred else '-',
-            }
-
-            if cross_occurred:
-                golden_list.append((ticker, row))
-
-        except Exception as e:
-            pass
-
-        if i % 50 == 0 or i == total:
-            print(f"  [{i:>3}/{total}] {i/total*100:5.1f}% 완료... (골든크로스 {len(golden_list)}개 발견)")
-        time.sleep(SLEEP_SEC)
-
-    if not golden_list:
+    """최근 gc_window일 이내 MA20이 MA200을 상향 돌파한 종목 표 (시가총액 순)"""
+    panel = load_panel(market, tickers, start, end)
+    if panel.empty:
+        return pd.DataFrame()
+
+    # (영업일 × 종목) 종가 행렬에서 MA20/MA200을 한 번에 계산
+    closes = panel['종가']
+    closes = closes[[t for t in tickers if t in closes.columns]]
+    close_mat = closes.to_numpy(dtype=np.float64)
+    m20  = rolling_mean(close_mat, 20)
+    m200 = rolling_mean(close_mat, 200)
+
+    # 최근 gc_window일의 (전일, 당일) 쌍만 비교. 슬라이스는 복사 없는 뷰
+    # recent[k, j] = (전일 MA20 ≤ MA200) & (당일 MA20 > MA200), NaN 비교는 False
+    t20, t200 = m20[-gc_window-1:], m200[-gc_window-1:]
+    recent = (t20[:-1] <= t200[:-1]) & (t20[1:] > t200[1:])
+    last_ma20, last_ma200 = m20[-1], m200[-1]
+    hit = recent.any(axis=0) & ~np.isnan(last_ma20) & ~np.isnan(last_ma200)
+    first = recent.argmax(axis=0)   # 가장 이른 돌파일 (argmax = 첫 True)
+
+    recent_dates = closes.index[-gc_window:].strftime('%Y-%m-%d')   # recent 행과 같은 순서
+    name_map = top_df['종목명'].to_dict()
+    cap_map  = top_df['시가총액(억원)'].to_dict()
+    rows = []
+    for j in np.flatnonzero(hit):
+        ticker = closes.columns[j]
+        ma20, ma200 = last_ma20[j], last_ma200[j]
+        rows.append((ticker, name_map[ticker], cap_map[ticker], int(close_mat[-1, j]),
+                     round(ma20), round(ma200), round((ma20/ma200 - 1)*100, 2),
+                     recent_dates[first[j]]))
+    print(f"  {closes.shape[1]}개 종목 판정 완료 (골든크로스 {len(rows)}개 발견)")
+
+    if not rows:
         return pd.DataFrame()
 
-    result = pd.DataFrame(
-        {t: r for t, r in golden_list}.values(),
-        index=[t for t, _ in golden_list]
-    )
-    result.index.name = '종목코드'
+    result = pd.DataFrame.from_records(rows, columns=['종목코드', *RESULT_COLUMNS], index='종목코드')
 
     # 시가총액 기준 정렬
     result = result.sort_values('시가총액(억원)', ascending=False)
@@ -142,7 +177,7 @@ for market in ['KOSPI', 'KOSDAQ']:
 
     print(f"\n[{market}] OHLCV 수집 + 골든크로스 탐색 중...")
     t0 = time.time()
-    gc_df = find_golden_cross(tickers, top_df, START_DATE, BASE_DATE, GC_WINDOW)
+    gc_df = find_golden_cross(market, tickers, top_df, START_DATE, BASE_DATE, GC_WINDOW)
     elapsed = time.time() - t0
 
     print(f"\n  소요시간: {elapsed:.0f}초")
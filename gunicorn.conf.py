@@ -0,0 +1,14 @@
+"""
+대시보드 운영 실행 설정 (gunicorn)
+실행: gunicorn app:app
+
+- 스캔 상태(scan_state)와 캐시가 프로세스 메모리에 있으므로 워커는 1개로 고정하고
+  스레드(gthread)로 동시 요청을 처리
+- /api/scan/stream (SSE) 연결이 스레드 1개씩 점유하므로 스레드 수에 여유를 둠
+"""
+
+bind = '0.0.0.0:8080'
+workers = 1
+worker_class = 'gthread'
+threads = 16
+timeout = 120
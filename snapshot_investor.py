@@ -0,0 +1,40 @@
+"""
+투자자별 순매수 TOP30 일별 스냅샷 저장
+- 장 마감 후 데이터는 바뀌지 않으므로 하루 한 번 받아서 파일로 저장
+- app.py의 /api/investor 는 파일이 있으면 KRX 요청 없이 그대로 전송
+실행: python3 snapshot_investor.py [--date YYYYMMDD]
+"""
+
+from __future__ import annotations
+import json
+import os
+from fetcher import get_investor_data, get_last_bday, INVESTOR_SNAPSHOT_DIR, investor_snapshot_name
+
+
+def save_snapshot(date: str) -> str | None:
+    """date의 투자자 데이터를 /api/investor 응답 형식으로 저장. 저장 경로 반환 (데이터 누락 시 None)"""
+    data = get_investor_data(date)
+
+    # KRX 차단/미제공으로 빈 결과가 섞여 있으면 확정 데이터로 남기지 않음
+    if not all(rows for inv in data['data'].values() for rows in inv.values()):
+        return None
+
+    os.makedirs(INVESTOR_SNAPSHOT_DIR, exist_ok=True)
+    path = os.path.join(INVESTOR_SNAPSHOT_DIR, investor_snapshot_name(date))
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'ok': True, 'data': data}, f, ensure_ascii=False)
+    return path
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--date', type=str, default=None, help='기준일 (YYYYMMDD, 기본: 최근 영업일)')
+    args = parser.parse_args()
+
+    date = args.date or get_last_bday()
+    path = save_snapshot(date)
+    if path:
+        print(f"✅ 투자자 데이터 저장: {path}")
+    else:
+        print(f"❌ {date} 투자자 데이터 일부 누락 - 저장하지 않음")
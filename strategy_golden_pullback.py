@@ -23,20 +23,16 @@
 """
 
 from __future__ import annotations
-import FinanceDataReader as fdr
 from pykrx import stock
 import pandas as pd
 import numpy as np
 import time
 import sys
-from typing import Optional
-from fetcher import get_ohlcv  # 로컬 데이터 연동
-
-# stdout/stderr 강제 UTF-8 모드 및 실시간 출력(버퍼링 제거) 방침
-if sys.stdout.encoding.lower() != 'utf-8':
-    sys.stdout.reconfigure(encoding='utf-8', line_buffering=True, write_through=True)
-if sys.stderr.encoding.lower() != 'utf-8':
-    sys.stderr.reconfigure(encoding='utf-8', line_buffering=True, write_through=True)
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from itertools import repeat
+from typing import Callable, Iterator, Optional
+from fetcher import get_ohlcv, read_ohlcv, last_ohlcv_date, stock_listing, ticker_lock  # 로컬 데이터 연동
 
 # ──────────────────────────────────────────────
 # 설정
@@ -45,15 +41,24 @@ GC_LOOKBACK   = 30           # 골든크로스 탐색 범위: 최근 몇 날 이
 PULLBACK_MIN  = 3            # GC 이후 최소 눌림 대기일
 PULLBACK_MAX  = 10           # GC 이후 최대 눌림 대기일
 TOUCH_MARGIN  = 0.02         # MA20 터치 허용 오차 (2%)
-SLEEP_SEC     = 0.02         # (변경) 기존 0.3s -> 0.02s 로 대폭 축소하여 초고속 스캔 (pykrx 밴 조심)
+MAX_WORKERS   = 8            # OHLCV 동시 로드 스레드 수 (KRX 요청 속도는 fetcher에서 제한)
 SIGNAL_LOOKBACK = 3          # 매수 신호 탐색: 눌림 이후 최근 N일
 
+MARKETS = ['KOSPI', 'KOSDAQ']
+
+# 타겟별 (저장 파일 접미사, 정렬 컬럼)
+TARGET_OUTPUTS = {
+    'pullback': ('gc_pullback_signal', '시가총액(억원)'),
+    'price_gc': ('golden_cross',       '시가총액(억원)'),
+    'vol_gc':   ('volume_ma',          'Volume_Ratio(배)'),
+}
+
 
 # ──────────────────────────────────────────────
 # 함수: 시가총액 상위 N개 추출 (fdr)
 # ──────────────────────────────────────────────
 def get_top_tickers(market: str, n: int) -> pd.DataFrame:
-    df = fdr.StockListing(market)
+    df = stock_listing(market)
     df = df.sort_values('Marcap', ascending=False)
     if n > 0:
         df = df.head(n)
@@ -65,13 +70,92 @@ def get_top_tickers(market: str, n: int) -> pd.DataFrame:
     return df
 
 
+# ──────────────────────────────────────────────
+# 함수: 이동평균 (누적합 기반)
+# ──────────────────────────────────────────────
+def rolling_mean(values, window: int) -> np.ndarray:
+    """
+    단순이동평균을 누적합 차분으로 한 번에 계산 (O(n), Series 생성 없음).
+    2차원 (영업일 × 종목) 배열이면 axis=0 방향으로 전 종목을 동시에 계산.
+    pandas rolling(window).mean()과 같이 창 안에 NaN이 있거나 앞쪽 window-1개는 NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+    if len(values) >= window:
+        valid = ~np.isnan(values)
+        csum = np.cumsum(np.where(valid, values, 0.0), axis=0)
+        ccnt = np.cumsum(valid, axis=0)
+        wsum = csum[window-1:].copy()
+        wsum[1:] -= csum[:-window]
+        wcnt = ccnt[window-1:].copy()
+        wcnt[1:] -= ccnt[:-window]
+        out[window-1:] = np.where(wcnt == window, wsum / window, np.nan)
+    return out
+
+
+# ──────────────────────────────────────────────
+# 함수: 3단계 신호 탐지 (숫자 배열 전용)
+# ──────────────────────────────────────────────
+def _detect(close: np.ndarray, high: np.ndarray, low: np.ndarray, open_: np.ndarray,
+            p20: np.ndarray, p200: np.ndarray, v20: np.ndarray, v200: np.ndarray
+            ) -> tuple[int, int, int]:
+    """
+    골든크로스 → 눌림 → 매수 신호 순으로 탐지해 (gc_idx, pullback_idx, signal_idx) 반환.
+    어느 단계든 실패하면 (-1, -1, -1). 날짜 포맷/결과 dict 생성은 호출부에서 처리.
+    """
+    n = len(close)
+
+    # ── 1단계: 최근 GC_LOOKBACK 영업일 이내 골든크로스 탐색 ──
+    search_start = max(201, n - GC_LOOKBACK - 1)
+    if search_start >= n:
+        return -1, -1, -1
+
+    # 가격 골든크로스 (전일 MA20 ≤ MA200, 당일 MA20 > MA200)
+    # + 거래량 조건: GC 발생 시점에 거래량 MA20 > MA200  (NaN 비교는 False)
+    # 전일/당일은 한 칸 어긋난 슬라이스(복사 없는 뷰)로 비교
+    prev, curr = slice(search_start - 1, n - 1), slice(search_start, n)
+    gc_mask = ((p20[prev] <= p200[prev]) & (p20[curr] > p200[curr])
+               & (v20[curr] > v200[curr]))
+    hits = np.flatnonzero(gc_mask)
+    if hits.size == 0:
+        return -1, -1, -1
+
+    # 가장 최근 골든크로스를 사용 (여러 개면 마지막 것)
+    gc_idx = int(search_start + hits[-1])
+
+    # ── 2단계: GC 이후 3~10 영업일 이내 MA20 눌림 탐색 ──
+    # 눌림 조건: 저가 또는 종가가 MA20 기준 ±TOUCH_MARGIN (±2%) 이내로 진입 (NaN 비교는 False)
+    pb_start = gc_idx + PULLBACK_MIN
+    w = slice(pb_start, min(gc_idx + PULLBACK_MAX + 1, n))
+    lo_band = p20[w] * (1 - TOUCH_MARGIN)
+    hi_band = p20[w] * (1 + TOUCH_MARGIN)
+    touch = (((lo_band <= low[w]) & (low[w] <= hi_band))
+             | ((lo_band <= close[w]) & (close[w] <= hi_band)))
+    hits = np.flatnonzero(touch)
+    if hits.size == 0:
+        return -1, -1, -1
+    pullback_idx = pb_start + int(hits[0])
+
+    # ── 3단계: 눌림 이후 매수 신호 탐색 (양봉 + 전일 고가 돌파) ──
+    sig_end = min(pullback_idx + SIGNAL_LOOKBACK + 1, n)
+    w = slice(pullback_idx + 1, sig_end)
+    prev_high = high[pullback_idx:sig_end - 1]
+    signal = (close[w] > open_[w]) & ((close[w] > prev_high) | (high[w] > prev_high))
+    hits = np.flatnonzero(signal)
+    if hits.size == 0:
+        return -1, -1, -1
+
+    return gc_idx, pullback_idx, pullback_idx + 1 + int(hits[0])
+
+
 # ──────────────────────────────────────────────
 # 함수: 전략 스캔 (종목별)
 # ──────────────────────────────────────────────
-def scan_strategy(df: pd.DataFrame) -> dict | None:
+def scan_strategy(df: pd.DataFrame, target: str | None = None) -> dict | None:
     """
     OHLCV DataFrame을 받아 3단계 전략 조건 분석.
     조건 충족 시 결과 dict 반환, 미충족 시 None.
+    target을 주면 해당 결과가 나올 수 없는 종목은 MA 계산 전에 바로 제외.
     """
     if df is None or len(df) < 201:
         return None
@@ -82,139 +166,66 @@ def scan_strategy(df: pd.DataFrame) -> dict | None:
     open_  = df['시가']
     volume = df['거래량']
 
-    # MA 계산
-    price_ma20  = close.rolling(20).mean()
-    price_ma200 = close.rolling(200).mean()
-    vol_ma20    = volume.rolling(20).mean()
-    vol_ma200   = volume.rolling(200).mean()
-
-    n = len(df)
-
-    # ── 1단계: 최근 GC_LOOKBACK 영업일 이내 골든크로스 탐색 ──
-    gc_idx = None
-    gc_date = None
-    search_start = max(201, n - GC_LOOKBACK - 1)
-
-    for i in range(search_start, n):
-        prev_p20  = price_ma20.iloc[i-1]
-        curr_p20  = price_ma20.iloc[i]
-        prev_p200 = price_ma200.iloc[i-1]
-        curr_p200 = price_ma200.iloc[i]
-        curr_v20  = vol_ma20.iloc[i]
-        curr_v200 = vol_ma200.iloc[i]
-
-        if any(pd.isna([prev_p20, curr_p20, prev_p200, curr_p200, curr_v20, curr_v200])):
-            continue
-
-        # 가격 골든크로스
-        price_gc = (prev_p20 <= prev_p200) and (curr_p20 > curr_p200)
-        # 거래량 조건: GC 발생 시점에 거래량 MA20 > MA200
-        vol_ok   = curr_v20 > curr_v200
-
-        if price_gc and vol_ok:
-            # 가장 최근 골든크로스를 사용 (여러 개면 마지막 것)
-            gc_idx  = i
-            gc_date = df.index[i]
-
-    if gc_idx is None:
+    # 조기 제외: price_gc는 마지막 MA20 > MA200, vol_gc는 마지막 거래량 MA5 > MA20이 필수
+    # (pullback은 GC 후 다시 역배열이어도 신호가 유효하므로 제외 조건 없음)
+    if target == 'price_gc' and close.iloc[-20:].mean() <= close.iloc[-200:].mean():
         return None
-
-    # ── 2단계: GC 이후 3~10 영업일 이내 MA20 눌림 탐색 ──
-    pullback_idx  = None
-    pullback_date = None
-    pullback_low  = None
-
-    end_search = min(gc_idx + PULLBACK_MAX + 1, n)
-    for i in range(gc_idx + PULLBACK_MIN, end_search):
-        if i >= n:
-            break
-        curr_low   = low.iloc[i]
-        curr_close = close.iloc[i]
-        curr_ma20  = price_ma20.iloc[i]
-
-        if pd.isna(curr_ma20):
-            continue
-
-        # 눌림 조건: 저가 또는 종가가 MA20 기준 ±TOUCH_MARGIN (±2%) 이내로 진입했는지 확인
-        touch_low   = (curr_ma20 * (1 - TOUCH_MARGIN) <= curr_low   <= curr_ma20 * (1 + TOUCH_MARGIN))
-        touch_close = (curr_ma20 * (1 - TOUCH_MARGIN) <= curr_close <= curr_ma20 * (1 + TOUCH_MARGIN))
-
-        if touch_low or touch_close:
-            pullback_idx  = i
-            pullback_date = df.index[i].strftime('%Y-%m-%d')
-            pullback_low  = round(curr_low)
-            break
-
-    if pullback_idx is None:
+    if target == 'vol_gc' and volume.iloc[-5:].mean() <= volume.iloc[-20:].mean():
         return None
 
-    # ── 3단계: 눌림 이후 매수 신호 탐색 (양봉 + 전일 고가 돌파) ──
-    signal_idx  = None
-    signal_date = None
-    signal_type = None
-
-    end_signal = min(pullback_idx + SIGNAL_LOOKBACK + 1, n)
-    for i in range(pullback_idx + 1, end_signal):
-        if i >= n:
-            break
-        curr_open  = open_.iloc[i]
-        curr_close = close.iloc[i]
-        curr_high  = high.iloc[i]
-        prev_high  = high.iloc[i-1]
-        curr_ma20  = price_ma20.iloc[i]
-
-        if any(pd.isna([curr_open, curr_close, curr_high, prev_high])):
-            continue
-
-        # 양봉 여부
-        is_bullish = curr_close > curr_open
-        # 전일 고가 돌파
-        breaks_prev_high = curr_close > prev_high or curr_high > prev_high
-
-        if is_bullish and breaks_prev_high:
-            signal_idx  = i
-            signal_date = df.index[i].strftime('%Y-%m-%d')
-            # 매수 시점이 오늘(마지막 날)이면 "오늘 신호", 이전이면 "발생"
-            if i == n - 1:
-                signal_type = '🔔 오늘 신호'
-            else:
-                signal_type = f'발생({df.index[i].strftime("%Y.%m.%d")})'
-            break
-
-    if signal_idx is None:
+    # MA 계산
+    p20  = rolling_mean(close, 20)
+    p200 = rolling_mean(close, 200)
+    v20  = rolling_mean(volume, 20)
+    v200 = rolling_mean(volume, 200)
+
+    gc_idx, pullback_idx, signal_idx = _detect(
+        close.to_numpy(dtype=np.float64), high.to_numpy(dtype=np.float64),
+        low.to_numpy(dtype=np.float64), open_.to_numpy(dtype=np.float64),
+        p20, p200, v20, v200)
+    if signal_idx < 0:
         return None
 
+    n = len(df)
+    # 필요한 세 날짜만 한 번의 벡터 strftime으로 포맷
+    gc_date, pullback_date, signal_date = df.index[[gc_idx, pullback_idx, signal_idx]].strftime('%Y-%m-%d')
+    pullback_low  = round(low.iloc[pullback_idx])
+    # 매수 시점이 오늘(마지막 날)이면 "오늘 신호", 이전이면 "발생"
+    if signal_idx == n - 1:
+        signal_type = '🔔 오늘 신호'
+    else:
+        signal_type = f'발생({signal_date.replace("-", ".")})'
+
     # ── 4단계: 거래량 골든크로스 (추가 요청) ──
-    v_ma5 = volume.rolling(5).mean()
-    curr_v5 = v_ma5.iloc[-1]
-    curr_v20 = vol_ma20.iloc[-1]
+    curr_v5 = volume.to_numpy(dtype=np.float64)[-5:].mean()
+    curr_v20 = v20[-1]
     
     vol_gc_ratio = 0
-    if not any(pd.isna([curr_v5, curr_v20])) and curr_v20 > 0 and curr_v5 > curr_v20:
+    if curr_v20 > 0 and curr_v5 > curr_v20:   # NaN 비교는 False이므로 별도 결측 검사 불필요
         vol_gc_ratio = round(curr_v5 / curr_v20, 2)
 
     # 최종 결과 (가격 GC & Pullback 신호 + 볼륨 GC 신호 분리 반환용)
     last_close  = close.iloc[-1]
-    last_ma20   = price_ma20.iloc[-1]
-    last_ma200  = price_ma200.iloc[-1]
+    last_ma20   = p20[-1]
+    last_ma200  = p200[-1]
     
-    gap_pct = round((last_ma20 / last_ma200 - 1) * 100, 2) if (not pd.isna(last_ma200) and last_ma200 > 0) else None
+    gap_pct = round((last_ma20 / last_ma200 - 1) * 100, 2) if last_ma200 > 0 else None
 
     # 가격 GC 정보
     price_gc_info = None
-    if curr_p20 > curr_p200 and not pd.isna(curr_p200):
+    if last_ma20 > last_ma200:
         # 방금 막 GC 된 경우만 잡을지, 단순히 역배열->정배열 상태만 잡을지는 현재 상태(>0)로 판단
         price_gc_info = {
             'MA20': round(last_ma20),
             'MA200': round(last_ma200),
             'MA20_MA200갭(%)': gap_pct,
-            '골든크로스일': gc_date.strftime('%Y-%m-%d') if gc_date else '진행중'
+            '골든크로스일': gc_date
         }
 
     pullback_info = None
-    if signal_idx is not None:
+    if signal_idx >= 0:
         pullback_info = {
-            'GC발생일':       gc_date.strftime('%Y-%m-%d') if gc_idx is not None else '-',
+            'GC발생일':       gc_date,
             '눌림일':         pullback_date,
             '눌림저가':       pullback_low,
             '매수신호일':     signal_date,
@@ -240,6 +251,175 @@ def scan_strategy(df: pd.DataFrame) -> dict | None:
     }
 
 
+# ──────────────────────────────────────────────
+# 함수: 결과 저장
+# ──────────────────────────────────────────────
+def _to_builtin(v):
+    """numpy 스칼라를 JSON 직렬화 가능한 파이썬 기본형으로 변환"""
+    if isinstance(v, np.integer): return int(v)
+    elif isinstance(v, np.floating): return float(v)
+    elif pd.isna(v): return None
+    return v
+
+
+def save_results(signals_list: list, market_name: str, prefix: str,
+                 sort_col: str, asc: bool = False) -> pd.DataFrame:
+    """신호 리스트를 DataFrame으로 변환 후 {market}_{prefix}.csv 로 저장"""
+    if not signals_list:
+        print(f"  ⚠ {prefix} 신호 없음")
+        return pd.DataFrame()
+
+    res_df = pd.DataFrame([r for _, r in signals_list])
+
+    if sort_col in res_df.columns:
+        res_df = res_df.sort_values(sort_col, ascending=asc)
+
+    # 순위 추가
+    res_df.insert(0, '순위', range(1, len(res_df)+1))
+
+    fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'{market_name.lower()}_{prefix}.csv')
+    res_df.to_csv(fname, encoding='utf-8-sig', index=False)
+    return res_df
+
+
+# ──────────────────────────────────────────────
+# 함수: 종목별 판정 결과 순회 (스레드 / 프로세스)
+# ──────────────────────────────────────────────
+def _scan_one(ticker: str, start_date: str, base_date: str, target: str) -> dict | None:
+    """프로세스 풀 작업 단위: 로컬 저장소에서 직접 읽어 판정 (DataFrame을 프로세스 간에 넘기지 않음)"""
+    try:
+        with ticker_lock(ticker):  # 다른 프로세스가 저장소를 교체하는 도중에 읽지 않도록
+            df = read_ohlcv(ticker)
+        return scan_strategy(df[start_date:base_date], target) if df is not None else None
+    except Exception:
+        return None
+
+
+def _refresh_store(ticker: str, start_date: str, base_date: str) -> bool:
+    """기준일까지 저장소 갱신. 조회 실패나 저장 실패로 저장소가 받은 데이터보다 뒤처지면 False"""
+    try:
+        df = get_ohlcv(ticker, start_date, base_date)
+        if df is None or df.empty:
+            return False
+        # 휴장일 등으로 새 거래일이 없으면 받은 데이터의 마지막 날짜 = 저장소 마지막 날짜
+        last = last_ohlcv_date(ticker)
+        return last is not None and last >= df.index[-1]
+    except Exception:
+        return False
+
+
+def _iter_scans(tickers: list, start_date: str, base_date: str, target: str,
+                processes: int = 0) -> Iterator[tuple[str, dict | None]]:
+    """
+    종목 순서대로 (ticker, scan_strategy 결과 또는 None)을 내보냄.
+    - processes == 0: OHLCV 로드(로컬 우선, 부족분은 KRX)를 스레드로 미리 진행, 판정은 현재 스레드
+    - processes > 0 : 기준일까지 저장소에 없는 종목만 먼저 스레드로 받아 두고,
+                      판정은 프로세스 풀에서 (CPU 작업이라 GIL 영향 없이 코어 수만큼 확장)
+    """
+    if processes > 0:
+        # KRX 요청 속도 제한은 프로세스 안에서만 공유되므로 네트워크 조회는 이 프로세스에서 끝냄
+        end_dt = pd.to_datetime(base_date)
+        stale = [t for t in tickers if (last_ohlcv_date(t) or pd.Timestamp.min) < end_dt]
+        failed = set()
+        if stale:
+            print(f"  로컬 저장소 갱신: {len(stale)}개 종목", flush=True)
+            with ThreadPoolExecutor(max_workers=MAX_WORKERS) as tpool:
+                refreshed = tpool.map(lambda t: _refresh_store(t, start_date, base_date), stale)
+                failed = {t for t, ok in zip(stale, refreshed) if not ok}
+            if failed:
+                # 갱신 못 한 종목은 예전 데이터로 base_date 신호를 내지 않도록 판정에서 제외
+                print(f"  ⚠️ 저장소 갱신 실패 {len(failed)}개 종목 제외: {', '.join(sorted(failed)[:10])}"
+                      f"{' ...' if len(failed) > 10 else ''}", flush=True)
+
+        ok_tickers = [t for t in tickers if t not in failed]
+        pool = ProcessPoolExecutor(max_workers=processes)
+        try:
+            results = iter(pool.map(_scan_one, ok_tickers, repeat(start_date), repeat(base_date),
+                                    repeat(target), chunksize=32))
+            for ticker in tickers:
+                yield ticker, (None if ticker in failed else next(results))
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return
+
+    pool = ThreadPoolExecutor(max_workers=MAX_WORKERS)
+    futures = [pool.submit(get_ohlcv, t, start_date, base_date) for t in tickers]
+    try:
+        for ticker, future in zip(tickers, futures):
+            try:
+                yield ticker, scan_strategy(future.result(), target)
+            except Exception:
+                yield ticker, None
+    finally:
+        # 중지 시 아직 시작하지 않은 로드는 취소
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+# ──────────────────────────────────────────────
+# 함수: 전체 스캔 실행 (CLI / 웹 서버 공용)
+# ──────────────────────────────────────────────
+def run_scan(target: str, base_date: str, start_date: str, top_n: int = 500,
+             on_progress: Optional[Callable[[str, int, int, int], None]] = None,
+             on_found: Optional[Callable[[str, dict], None]] = None,
+             should_stop: Optional[Callable[[], bool]] = None,
+             processes: int = 0) -> dict | None:
+    """
+    KOSPI → KOSDAQ 순서로 target 전략을 스캔하고 시장별 결과 CSV 저장.
+    - on_progress(market, current, total, signals_found): 종목 1개 처리마다 호출
+      (current == 0 은 해당 시장 스캔 시작)
+    - on_found(market, item): 신호 종목 발견 시 호출 (item은 JSON 직렬화 가능한 dict)
+    - should_stop(): True 반환 시 저장 없이 즉시 중단하고 None 반환
+    - processes: 0이면 스레드만 사용, 양수면 판정을 해당 개수의 프로세스로 분산
+    반환: {market: 결과 DataFrame}
+    """
+    prefix, sort_col = TARGET_OUTPUTS[target]
+    results = {}
+
+    # 누적 발견 신호 수 (UI 표시용)
+    total_found_cnt = 0
+
+    for market in MARKETS:
+        print(f"\n[{market}] 시가총액 상위 {top_n if top_n > 0 else '전체'}개 추출 중...", flush=True)
+        top_df  = get_top_tickers(market, top_n)
+        tickers = top_df.index.tolist()
+        total_tickers = len(tickers)
+
+        print(f"\n[{market}] 전략 스캔 시작 (총 {total_tickers}개 종목)...", flush=True)
+        if on_progress:
+            on_progress(market, 0, total_tickers, total_found_cnt)
+
+        signals = []
+        name_map = top_df['종목명'].to_dict()
+        cap_map  = top_df['시가총액(억원)'].to_dict()
+        scans = _iter_scans(tickers, start_date, base_date, target, processes)
+        try:
+            for i, (ticker, result) in enumerate(scans, 1):
+                if should_stop and should_stop():
+                    return None
+                if result and result[target]:
+                    base_info = {
+                        '종목명': name_map[ticker],
+                        '종목코드': ticker,
+                        '시가총액(억원)': cap_map[ticker],
+                        '종가': result['종가']
+                    }
+                    found_item = {**base_info, **result[target]}
+                    signals.append((ticker, found_item))
+                    total_found_cnt += 1
+                    if on_found:
+                        on_found(market, {k: _to_builtin(v) for k, v in found_item.items()})
+
+                if on_progress:
+                    on_progress(market, i, total_tickers, total_found_cnt)
+        finally:
+            scans.close()
+
+        # 타겟에 따라 지정된 CSV 1개만 저장
+        results[market] = save_results(signals, market, prefix, sort_col)
+
+    return results
+
+
 import argparse
 
 # ──────────────────────────────────────────────
@@ -247,11 +427,20 @@ import argparse
 # ──────────────────────────────────────────────
 if __name__ == '__main__':
     from datetime import datetime, timedelta
+
+    # stdout/stderr 강제 UTF-8 모드 및 실시간 출력(버퍼링 제거) 방침
+    if sys.stdout.encoding.lower() != 'utf-8':
+        sys.stdout.reconfigure(encoding='utf-8', line_buffering=True, write_through=True)
+    if sys.stderr.encoding.lower() != 'utf-8':
+        sys.stderr.reconfigure(encoding='utf-8', line_buffering=True, write_through=True)
+
     parser = argparse.ArgumentParser(description="주식 스크리닝 (GC, 눌림매수, 거래량GC 분리 실행)")
     parser.add_argument('--target', type=str, required=True, choices=['price_gc', 'vol_gc', 'pullback'],
                         help="스캔할 대상을 지정합니다: price_gc, vol_gc, pullback")
     parser.add_argument('--target_date', type=str, default=None, help="기준일 (예: 2026-02-23)")
     parser.add_argument('--top_n', type=int, default=500, help="조회할 시가총액 상위 종목 수 (0이면 전체)")
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1,
+                        help="판정에 사용할 프로세스 수 (0이면 스레드만 사용)")
     args = parser.parse_args()
 
     if args.target_date:
@@ -266,116 +455,28 @@ if __name__ == '__main__':
     print(f"기준일: {BASE_DATE}  |  데이터 시작: {START_DATE}")
     print("=" * 60)
 
-    all_pullback_signals = {}
-    all_price_gcs = {}
-    all_vol_gcs = {}
-
-    # 누적 발견 신호 수 (UI 표시용)
-    total_found_cnt = 0
-
-    for market in ['KOSPI', 'KOSDAQ']:
-        print(f"\n[{market}] 시가총액 상위 {args.top_n if args.top_n > 0 else '전체'}개 추출 중...", flush=True)
-        top_df  = get_top_tickers(market, args.top_n)
-        tickers = top_df.index.tolist()
-        total_tickers = len(tickers)
-
-        print(f"\n[{market}] 전략 스캔 시작 (총 {total_tickers}개 종목)...", flush=True)
-        t0 = time.time()
-        
-        pb_signals = []
-        pgc_signals = []
-        vgc_signals = []
-
-        for i, ticker in enumerate(tickers, 1):
-            try:
-                # fetcher를 통해 로컬 우선 데이터 로드 (매우 빠름)
-                df = get_ohlcv(ticker, START_DATE, BASE_DATE)
-                result = scan_strategy(df)
-                if result:
-                    base_info = {
-                        '종목명': top_df.loc[ticker, '종목명'],
-                        '종목코드': ticker,
-                        '시가총액(억원)': top_df.loc[ticker, '시가총액(억원)'],
-                        '종가': result['종가']
-                    }
-                    
-                    found_item = None
-                    if args.target == 'pullback' and result['pullback']:
-                        found_item = {**base_info, **result['pullback']}
-                        pb_signals.append((ticker, found_item))
-                        total_found_cnt += 1
-                    elif args.target == 'price_gc' and result['price_gc']:
-                        found_item = {**base_info, **result['price_gc']}
-                        pgc_signals.append((ticker, found_item))
-                        total_found_cnt += 1
-                    elif args.target == 'vol_gc' and result['vol_gc']:
-                        found_item = {**base_info, **result['vol_gc']}
-                        vgc_signals.append((ticker, found_item))
-                        total_found_cnt += 1
-                        
-                    if found_item:
-                        import json
-                        import numpy as np
-                        def _cvt(v):
-                            if isinstance(v, (np.integer, np.int64)): return int(v)
-                            elif isinstance(v, (np.floating, np.float64)): return float(v)
-                            elif pd.isna(v): return None
-                            return v
-                        clean_item = {k: _cvt(v) for k, v in found_item.items()}
-                        print(f"!!!FOUND_JSON!!! {json.dumps({'market': market, 'item': clean_item}, ensure_ascii=False)}", flush=True)
-            except Exception:
-                pass
-
-            if True: # 모든 종목(매 루프)마다 실시간 출력 (리얼타임 퍼센트 적용)
-                elapsed = time.time() - t0
-                # [시장명][현재/전체] 신호 N개 발견 형식으로 출력하여 app.py에서 인식하기 쉽게 함
-                print(f"  [{market}][{i:>3}/{total_tickers}] 신호 {total_found_cnt}개 발견  ({elapsed:.0f}s)", flush=True)
-            time.sleep(SLEEP_SEC)
-
-        # DataFrame 변환 및 저장 헬퍼 함수
-        def save_results(signals_list, market_name, prefix, sort_col, asc=False):
-            if not signals_list:
-                print(f"  ⚠ {prefix} 신호 없음")
-                return pd.DataFrame()
-                
-            res_df = pd.DataFrame([r for _, r in signals_list])
-            
-            if sort_col in res_df.columns:
-                res_df = res_df.sort_values(sort_col, ascending=asc)
-            
-            # 순위 추가
-            res_df.insert(0, '순위', range(1, len(res_df)+1))
-            
-            import os
-            fname = os.path.join(os.path.dirname(os.path.abspath(__file__)), f'{market_name.lower()}_{prefix}.csv')
-            res_df.to_csv(fname, encoding='utf-8-sig', index=False)
-            return res_df
-
-        # 타겟에 따라 지정된 CSV 1개만 저장
-        if args.target == 'pullback':
-            all_pullback_signals[market] = save_results(pb_signals, market, 'gc_pullback_signal', '시가총액(억원)')
-        elif args.target == 'price_gc':
-            all_price_gcs[market] = save_results(pgc_signals, market, 'golden_cross', '시가총액(억원)')
-        elif args.target == 'vol_gc':
-            all_vol_gcs[market] = save_results(vgc_signals, market, 'volume_ma', 'Volume_Ratio(배)')
-
-# ──────────────────────────────────────────────
-# 결과 출력
-# ──────────────────────────────────────────────
-print("\n" + "=" * 60)
-for market in ['KOSPI', 'KOSDAQ']:
-    if args.target == 'pullback':
-        df = all_pullback_signals.get(market, pd.DataFrame())
-    elif args.target == 'price_gc':
-        df = all_price_gcs.get(market, pd.DataFrame())
-    else:
-        df = all_vol_gcs.get(market, pd.DataFrame())
-        
-    print(f"\n=== {market} {args.target} 신호 (총 {len(df)}개) ===")
-    if not df.empty:
-        print(df.to_string(index=True))
-    else:
-        print("  없음")
-
-print("\n✅ 완료!")
-print("  저장 완료되었습니다.")
+    t0 = time.time()
+
+    def print_progress(market, current, total, found):
+        if current == 0:
+            return
+        elapsed = time.time() - t0
+        print(f"  [{market}][{current:>3}/{total}] 신호 {found}개 발견  ({elapsed:.0f}s)", flush=True)
+
+    all_results = run_scan(args.target, BASE_DATE, START_DATE, args.top_n,
+                           on_progress=print_progress, processes=args.processes)
+
+    # ──────────────────────────────────────────────
+    # 결과 출력
+    # ──────────────────────────────────────────────
+    print("\n" + "=" * 60)
+    for market in MARKETS:
+        df = all_results.get(market, pd.DataFrame())
+        print(f"\n=== {market} {args.target} 신호 (총 {len(df)}개) ===")
+        if not df.empty:
+            print(df.to_string(index=True))
+        else:
+            print("  없음")
+
+    print("\n✅ 완료!")
+    print("  저장 완료되었습니다.")
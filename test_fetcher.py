@@ -0,0 +1,39 @@
+"""fetcher.py OHLCV 저장소 dtype 변환 테스트"""
+
+import pandas as pd
+import pytest
+
+pytest.importorskip('pykrx')
+pytest.importorskip('FinanceDataReader')
+
+import fetcher
+
+
+def _frame(close):
+    idx = pd.to_datetime(['2026-02-19', '2026-02-20'])
+    return pd.DataFrame({'시가': [100, 101], '고가': [110, 111], '저가': [90, 91],
+                         '종가': close, '거래량': [1000, 2000]}, index=idx)
+
+
+def test_downcast_integer_prices_to_int32():
+    out = fetcher._downcast(_frame([105, 106]))
+    assert out['종가'].dtype == 'int32'
+    assert out['거래량'].dtype == 'int64'
+
+
+def test_downcast_keeps_fractional_prices():
+    out = fetcher._downcast(_frame([1.7, 106.0]))
+    assert out['종가'].dtype == 'float64'
+    assert out['종가'].iloc[0] == 1.7
+
+
+def test_downcast_keeps_missing_values():
+    out = fetcher._downcast(_frame([float('nan'), 106.0]))
+    assert out['종가'].isna().iloc[0]
+
+
+def test_fractional_prices_survive_parquet_roundtrip(tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    monkeypatch.setattr(fetcher, 'DATA_DIR', str(tmp_path))
+    fetcher.write_ohlcv('000000', _frame([1.7, 106.0]))
+    assert fetcher.read_ohlcv('000000')['종가'].iloc[0] == 1.7
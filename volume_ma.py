@@ -4,16 +4,23 @@ KOSPI / KOSDAQ 시가총액 상위 500개 종목
 
 데이터 소스:
   - 종목 리스트 + 시가총액: FinanceDataReader (KRX 기반)
-  - OHLCV 히스토리:         pykrx (KRX 공식)
+  - 거래량 히스토리:       pykrx (KRX 공식) 영업일별 전 종목 시세
 
-실행 시간: 약 6~10분 (1000 종목 × API 호출)
+실행 시간: 약 1분 미만 (시장별 영업일 수만큼 API 호출)
 """
 
-import FinanceDataReader as fdr
 from pykrx import stock
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
+import codecs
+import glob
+import os
+import pyarrow as pa
+import pyarrow.csv as pacsv
 import time
+from concurrent.futures import ThreadPoolExecutor
+from fetcher import DATA_DIR, RateLimiter, krx_request, stock_listing  # 임포트 시 pykrx keep-alive 세션 공유도 적용됨
 
 # ──────────────────────────────────────────────
 # 설정
@@ -21,11 +28,22 @@ import time
 TOP_N     = 500       # 시가총액 상위 N개
 MA_SHORT  = 5         # 단기 이동평균
 MA_LONG   = 20        # 장기 이동평균
-SLEEP_SEC = 0.3       # API 호출 간격 (초)
+MAX_WORKERS     = 12  # 영업일별 시세 동시 조회 스레드 수
+MAX_REQ_PER_SEC = 10  # KRX 요청 속도 상한 (스레드 전체 합산)
 
-# 날짜 설정: 20일 MA를 위해 영업일 기준 30일 여유를 두고 조회
-end_date   = (datetime.now() - timedelta(days=1)).strftime('%Y%m%d')   # 어제
-start_date = (datetime.now() - timedelta(days=45)).strftime('%Y%m%d')  # 45일 전
+_limiter = RateLimiter(MAX_REQ_PER_SEC)
+
+# 영업일별 전 종목 거래량 캐시: data/daily_volume/{시장}_{YYYYMMDD}.parquet
+# 지난 영업일 시세는 바뀌지 않으므로 재실행 시 새 영업일만 조회
+VOLUME_CACHE_DIR = os.path.join(DATA_DIR, 'daily_volume')
+
+# 날짜 설정: 달력 45일 안의 KRX 영업일(휴장일 반영)을 한 번만 조회해 최근 MA_LONG일만 사용
+now        = datetime.now()   # 한 번만 읽어 자정 전후로 날짜가 어긋나지 않게 함
+today      = now.strftime('%Y%m%d')
+end_date   = (now - timedelta(days=1)).strftime('%Y%m%d')   # 어제
+business_days = stock.get_previous_business_days(
+    fromdate=(now - timedelta(days=45)).strftime('%Y%m%d'), todate=end_date)[-MA_LONG:]
+start_date = business_days[0].strftime('%Y%m%d')
 
 print(f"기준 기간: {start_date} ~ {end_date}")
 print(f"상위 {TOP_N}개 / MA{MA_SHORT} / MA{MA_LONG}")
@@ -33,11 +51,12 @@ print("=" * 55)
 
 
 # ──────────────────────────────────────────────
-# 함수: 시가총액 상위 N개 종목 추출 (fdr 사용)
+# 함수: 시가총액 상위 N개 종목 추출 (fdr KRX 전체 목록 1회 조회)
 # ──────────────────────────────────────────────
-def get_top_tickers(market: str, n: int) -> pd.DataFrame:
-    df = fdr.StockListing(market)
-    df = df.sort_values('Marcap', ascending=False).head(n).copy()
+def get_top_tickers(listing: pd.DataFrame, market: str, n: int) -> pd.DataFrame:
+    """KRX 전체 상장 목록(listing)에서 market 종목만 골라 시가총액 상위 n개"""
+    # 'KOSDAQ GLOBAL' 소속도 KOSDAQ으로 포함
+    df = listing[listing['Market'].str.startswith(market)].nlargest(n, 'Marcap').copy()
     df['시가총액(억원)'] = (df['Marcap'] / 1e8).astype(int)
     df = df.rename(columns={'Code': '종목코드', 'Name': '종목명', 'Close': '종가'})
     df = df.set_index('종목코드')[['종목명', '시가총액(억원)', '종가']]
@@ -46,76 +65,135 @@ def get_top_tickers(market: str, n: int) -> pd.DataFrame:
 
 
 # ──────────────────────────────────────────────
-# 함수: 종목별 pykrx OHLCV → 거래량 MA 계산
+# 함수: 영업일별 전 종목 거래량 → 거래량 MA 계산
 # ──────────────────────────────────────────────
-def calc_volume_ma(tickers: list, start: str, end: str,
+def calc_volume_ma(market: str, tickers: list, days: list,
                    ma_short: int, ma_long: int) -> pd.DataFrame:
-    results = {}
-    total = len(tickers)
+    """
+    영업일마다 get_market_ohlcv_by_ticker로 시장 전 종목 시세를 한 번에 받아
+    [날짜 × 종목] 거래량 행렬을 만든 뒤 MA를 일괄 계산 (요청 수 = 영업일 수, 종목 수와 무관)
+    market='ALL'이면 KOSPI/KOSDAQ을 같은 요청으로 함께 처리
+    """
+    total = len(days)
+
+    os.makedirs(VOLUME_CACHE_DIR, exist_ok=True)
+
+    def fetch(day):
+        ymd = day.strftime('%Y%m%d')
+        path = os.path.join(VOLUME_CACHE_DIR, f"{market}_{ymd}.parquet")
+        if os.path.exists(path):
+            try:
+                return day, pd.read_parquet(path)['거래량']
+            except Exception:
+                pass
 
-    for i, ticker in enumerate(tickers, 1):
         try:
-            df = stock.get_market_ohlcv(start, end, ticker)
-            if df is None or df.empty or len(df) < ma_long:
-                results[ticker] = {'거래량_최근': None,
-                                   f'MA{ma_short}': None,
-                                   f'MA{ma_long}': None}
-                continue
-
-            vol = df['거래량']
-            results[ticker] = {
-                '거래량_최근': int(vol.iloc[-1]),
-                f'MA{ma_short}':  round(vol.rolling(ma_short).mean().iloc[-1]),
-                f'MA{ma_long}':   round(vol.rolling(ma_long).mean().iloc[-1]),
-            }
-        except Exception as e:
-            results[ticker] = {'거래량_최근': None,
-                               f'MA{ma_short}': None,
-                               f'MA{ma_long}': None}
-
-        if i % 50 == 0 or i == total:
-            pct = i / total * 100
-            print(f"  [{i:>3}/{total}] {pct:5.1f}% 완료...")
-        time.sleep(SLEEP_SEC)
-
-    return pd.DataFrame(results).T
+            day_df = krx_request(stock.get_market_ohlcv_by_ticker, ymd, market=market, limiter=_limiter)
+            if day_df is None or day_df.empty:
+                return day, None
+            if ymd < today:   # 장중(당일) 시세는 바뀔 수 있으므로 캐시하지 않음
+                day_df[['거래량']].to_parquet(path)
+            return day, day_df['거래량']
+        except Exception:
+            return day, None
+
+    # 네트워크 대기 위주이므로 스레드로 겹쳐서 조회 (요청 속도는 _limiter로 제한)
+    vol_by_day = {}
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        for i, (day, vol) in enumerate(pool.map(fetch, days), 1):
+            if vol is not None:
+                vol_by_day[day] = vol
+            if i % 10 == 0 or i == total:
+                print(f"  [{i:>2}/{total}] {i / total * 100:5.1f}% 완료...")
+
+    # 영업일 시세가 비면 요청 실패로 간주: 한 번 더 순차 조회하고, 그래도 빠지면 중단
+    # (빠진 날이 있으면 전 종목 MA가 NaN이 되어 기존 CSV를 빈 결과로 덮어쓰게 됨)
+    for day in [d for d in days if d not in vol_by_day]:
+        _, vol = fetch(day)
+        if vol is not None:
+            vol_by_day[day] = vol
+    missing = [d.strftime('%Y-%m-%d') for d in days if d not in vol_by_day]
+    if missing:
+        raise RuntimeError(f"[{market}] 영업일 거래량 조회 실패: {', '.join(missing)} - 결과를 저장하지 않음")
+
+    # 조회 기간보다 오래된 캐시 정리 (파일명 끝의 날짜 기준, 다른 시장 구분 캐시 포함)
+    for path in glob.glob(os.path.join(VOLUME_CACHE_DIR, "*_*.parquet")):
+        if os.path.basename(path)[-len('YYYYMMDD.parquet'):-len('.parquet')] < days[0].strftime('%Y%m%d'):
+            os.remove(path)
+
+    cols = ['거래량_최근', f'MA{ma_short}', f'MA{ma_long}']
+
+    # 행=날짜, 열=종목 (상위 N개만). 해당일 시세가 없는 종목은 NaN
+    vol_mat = pd.DataFrame(vol_by_day).T.sort_index().reindex(columns=tickers).to_numpy(dtype=np.float64)
+
+    # 마지막 값만 필요하므로 rolling 대신 끝부분 평균을 전 종목 한 번에 계산
+    # (창 안에 NaN이 있으면 NaN → rolling(k).mean().iloc[-1]과 동일)
+    out = np.empty((len(tickers), 3), dtype=np.float64)
+    out[:, 0] = vol_mat[-1]
+    out[:, 1] = vol_mat[-ma_short:].mean(axis=0).round()
+    out[:, 2] = vol_mat[-ma_long:].mean(axis=0).round()
+    # 거래일 수가 MA{ma_long}에 못 미치는 종목(신규 상장 등)은 결과 없음
+    out[(~np.isnan(vol_mat)).sum(axis=0) < ma_long] = np.nan
+
+    # 결측을 허용하는 정수형(Int64)으로 저장해 CSV에 정수로 기록
+    return pd.DataFrame(out, index=tickers, columns=cols).astype('Int64')
+
+
+# ──────────────────────────────────────────────
+# 함수: CSV 저장 (pyarrow 멀티스레드 writer)
+# ──────────────────────────────────────────────
+def save_csv(df: pd.DataFrame, fname: str) -> None:
+    """to_csv(encoding='utf-8-sig')와 같은 인코딩(엑셀 호환 BOM 포함)으로 pyarrow CSV writer 사용"""
+    table = pa.Table.from_pandas(df.reset_index(), preserve_index=False)
+    with open(fname, 'wb') as f:
+        f.write(codecs.BOM_UTF8)
+        # 기본값은 모든 문자열을 따옴표로 감싸므로 to_csv처럼 필요할 때만 감싸도록 지정
+        pacsv.write_csv(table, f, write_options=pacsv.WriteOptions(quoting_style='needed'))
 
 
 # ──────────────────────────────────────────────
 # MAIN
 # ──────────────────────────────────────────────
 all_results = {}
+listing = stock_listing('KRX')   # KOSPI/KOSDAQ 공용 (한 번만 조회)
 
+top_dfs = {}
 for market in ['KOSPI', 'KOSDAQ']:
     print(f"\n{'='*55}")
     print(f"[{market}] 시가총액 상위 {TOP_N}개 추출 중...")
-    top_df = get_top_tickers(market, TOP_N)
-    tickers = top_df.index.tolist()
+    top_df = get_top_tickers(listing, market, TOP_N)
+    top_dfs[market] = top_df
 
     print(f"  1위  : {top_df.iloc[0]['종목명']}  {top_df.iloc[0]['시가총액(억원)']:,}억원")
     print(f"  {TOP_N}위 : {top_df.iloc[-1]['종목명']}  {top_df.iloc[-1]['시가총액(억원)']:,}억원")
 
-    print(f"\n[{market}] 거래량 히스토리 수집 + MA 계산 중...")
-    t0 = time.time()
-    ma_df = calc_volume_ma(tickers, start_date, end_date, MA_SHORT, MA_LONG)
-    elapsed = time.time() - t0
-    print(f"  소요시간: {elapsed:.0f}초")
+# 두 시장 종목을 합쳐(중복 제거) 영업일당 전 시장 시세(market='ALL') 1회만 조회
+all_tickers = list(dict.fromkeys(t for top_df in top_dfs.values() for t in top_df.index))
+print(f"\n[KOSPI+KOSDAQ] 영업일별 거래량 수집 + MA 계산 중... ({len(all_tickers)}개 종목)")
+t0 = time.time()
+ma_df = calc_volume_ma('ALL', all_tickers, business_days, MA_SHORT, MA_LONG)
+elapsed = time.time() - t0
+print(f"  소요시간: {elapsed:.0f}초")
 
+for market, top_df in top_dfs.items():
     # 합치기
     result = top_df.join(ma_df)
     result.insert(0, '순위', range(1, len(result) + 1))
     result.index.name = '종목코드'
 
     # MA 비율 (단기/장기) - 1 이상이면 거래량 증가 추세
-    denom = pd.to_numeric(result[f'MA{MA_LONG}'], errors='coerce').replace(0, float('nan'))
-    numer = pd.to_numeric(result[f'MA{MA_SHORT}'], errors='coerce')
-    result['MA비율(단기/장기)'] = (numer / denom).round(3)
+    # 장기 MA가 0 이하이거나 결측이면 NaN (NaN 비교는 False라 where에서 제외됨)
+    short_ma = result[f'MA{MA_SHORT}'].to_numpy(dtype=np.float64, na_value=np.nan)
+    long_ma  = result[f'MA{MA_LONG}'].to_numpy(dtype=np.float64, na_value=np.nan)
+    ratio = np.full_like(long_ma, np.nan)
+    np.divide(short_ma, long_ma, out=ratio, where=long_ma > 0)
+    result['MA비율(단기/장기)'] = ratio.round(3)
 
     all_results[market] = result
 
     # CSV 저장
     fname = f'/Users/jaeduchan/Documents/jhan/antigravity/KOSPI_KODEX/{market.lower()}_volume_ma.csv'
-    result.to_csv(fname, encoding='utf-8-sig')
+    save_csv(result, fname)
     print(f"  저장: {fname}")
 
 